@@ -3,49 +3,231 @@
 # ======================================================================
 
 # Python 3
+from collections import Counter
 from collections import defaultdict
 from collections import OrderedDict
 
+from collections.abc import MutableMapping
+
+from weakref import WeakSet
+
 # Source.Python
 from effects import DispatchEffectData
 from effects import temp_entities
 from engines.precache import Model
+from events.manager import event_manager
+from filters.players import PlayerIter
 from filters.recipients import RecipientFilter
+from listeners import ClientActive
+from listeners import ClientDisconnect
+from listeners import LevelInit
+from listeners import Tick
 from mathlib import Vector
 
+# Xtend
+from xtend.players import PlayerEntity
+from xtend.players import get_nearby_players
+from xtend.players import player_grid
+
 
 # ======================================================================
 # >> HELPERS
 # ======================================================================
 
-class _keydefaultdict(defaultdict):
+class _ModelIndexes(OrderedDict):
     """
-    http://stackoverflow.com/a/2912455/2505645
+    Maps model paths to their indexes, precaching unknown models.
+
+    The Model objects are kept alive with their indexes. When the cache
+    is full, the models resolved first are removed first.
     """
 
-    def __missing__(self, key):
-        if self.default_factory is None:
-            raise KeyError(key)
+    def __init__(self, max_size=1024):
+        """Initializes a new model index cache."""
+        super().__init__()
+        self.max_size = max_size
+        self._models = {}
+
+    def __missing__(self, path):
+        """Precaches a model and returns its index."""
+        while len(self) >= self.max_size:
+            oldest, _ = self.popitem(last=False)
+            del self._models[oldest]
+        model = self._models[path] = Model(path)
+        self[path] = model.index
+        return model.index
+
+    def clear(self):
+        """Removes all the models from the cache."""
+        super().clear()
+        self._models.clear()
+
+
+def _bind_arguments(positions, values, args, kwargs):
+    """Patches positional and keyword arguments into a list of values."""
+    if args:
+        if len(args) > len(values):
+            raise IndexError('Too many arguments given')
+        values[:len(args)] = args
+    for name, value in kwargs.items():
+        try:
+            values[positions[name]] = value
+        except KeyError:
+            raise TypeError('Unknown argument: {0}'.format(name)) from None
+
+
+def _copy_values(values):
+    """
+    Returns a copy of the values safe to hold on to,
+    and a hashable key for comparing them.
+    """
+    copies = []
+    key = []
+    for value in values:
+        if isinstance(value, Vector):
+            copies.append(Vector(value.x, value.y, value.z))
+            key.append((value.x, value.y, value.z))
+            continue
+        copies.append(value)
+        try:
+            hash(value)
+        except TypeError:
+            key.append(id(value))
         else:
-            ret = self[key] = self.default_factory(key).index
-            return ret
+            key.append(value)
+    return copies, tuple(key)
+
+
+class _ArgsView(MutableMapping):
+    """Ordered mapping view over an effect's argument values."""
+
+    def __init__(self, owner):
+        """Initializes a new view over an effect class or instance."""
+        self._owner = owner
+
+    def __getitem__(self, name):
+        """Returns an argument's value."""
+        return self._owner._values[self._owner._positions[name]]
+
+    def __setitem__(self, name, value):
+        """Sets an argument's value."""
+        _bind_arguments(
+            self._owner._positions, self._owner._values, (), {name: value})
+
+    def __delitem__(self, name):
+        """Arguments can't be removed from an effect."""
+        raise TypeError('Effect arguments can not be removed')
+
+    def __iter__(self):
+        """Iterates over the argument names in order."""
+        return iter(self._owner._names)
+
+    def __len__(self):
+        """Returns the amount of arguments."""
+        return len(self._owner._names)
+
+    def __repr__(self):
+        """Returns the arguments as an OrderedDict would."""
+        return repr(self.copy())
+
+    def copy(self):
+        """Returns the arguments as a new OrderedDict."""
+        return OrderedDict(self.items())
+
+
+class _ArgsDescriptor:
+    """Gives effect classes and instances an ordered args mapping."""
+
+    def __get__(self, instance, owner):
+        """Returns a view over the class' or the instance's values."""
+        return _ArgsView(owner if instance is None else instance)
+
+    def __set__(self, instance, args):
+        """Writes the given arguments into the instance's values."""
+        _bind_arguments(instance._positions, instance._values, (), args)
+
+
+class _Default:
+    """Default argument value created when its effect class is compiled."""
+
+    __slots__ = ('factory',)
+
+    def __init__(self, factory):
+        """Initializes a new default created by the factory."""
+        self.factory = factory
+
+
+class _TemplateAttribute:
+    """Attribute of an effect class' template, compiled on first access."""
+
+    def __init__(self, name):
+        """Initializes a new template attribute."""
+        self.name = name
 
+    def __get__(self, instance, owner):
+        """Compiles the template of the class that defined the args."""
+        for cls in owner.__mro__:
+            if '_raw_args' in cls.__dict__:
+                _compile_template(cls)
+                break
+        return getattr(owner, self.name)
 
-def _update_ordered_dict(ordered_dict, args, kwargs):
-    """Updates an OrderedDict object."""
-    if len(args) > len(ordered_dict):
-        raise IndexError('Too many arguments given')
-    keys = ordered_dict.keys()
-    for i, v in enumerate(args):
-        ordered_dict[keys[i]] = v
-    ordered_dict.update(kwargs)
+
+def _compile_template(cls):
+    """Compiles an effect class' args into a positional template."""
+    args = cls.__dict__['_raw_args']
+    cls._names = tuple(args)
+    cls._positions = {key: i for i, key in enumerate(args)}
+    cls._values = [
+        value.factory() if isinstance(value, _Default) else value
+        for value in args.values()
+    ]
+    cls._model_position = cls._positions.get('model')
+    del cls._raw_args
+
+
+class _EffectMeta(type):
+    """
+    Compiles an effect class' args into a positional template
+    the first time the class or its instances need it.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        """Creates a new effect class."""
+        args = namespace.get('args')
+        if args is not None:
+            namespace['args'] = _ArgsDescriptor()
+            namespace['_raw_args'] = args
+            for attribute in _TEMPLATE_ATTRIBUTES:
+                namespace[attribute] = _TemplateAttribute(attribute)
+        cls = super().__new__(mcs, name, bases, namespace)
+        cls._effect_class = cls
+        return cls
 
 
 # ======================================================================
 # >> GLOBALS
 # ======================================================================
 
-_model_indexes = _keydefaultdict(Model)
+_TEMPLATE_ATTRIBUTES = ('_names', '_positions', '_values', '_model_position')
+
+# Defaults created for each effect class once its template is compiled
+_VECTOR = _Default(Vector)
+_DISPATCH_EFFECT_DATA = _Default(DispatchEffectData)
+
+_model_indexes = _ModelIndexes()
+_registered_models = set()
+_model_effects = WeakSet()
+
+_batches = []
+_deferred_batches = []
+_recorders = []
+
+_budget = None
+
+_recipients = {}
+_nearby_recipients = {}
+_invalidate_recipients_next_tick = False
 
 
 # ======================================================================
@@ -56,15 +238,131 @@ __all__ = (
     'BeamEntPoint',
     'BeamEnts',
     'BeamPoints',
-    'BeamFollow'
+    'BeamFollow',
+    'EffectBatch',
+    'EffectBudget',
+    'all_recipients',
+    'get_effect_budget',
+    'nearby_recipients',
+    'precache_models',
+    'register_models',
+    'set_effect_budget',
+    'team_recipients'
 )
 
 
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def all_recipients():
+    """
+    Returns a cached filter of all the players.
+
+    The cached filters are shared by everyone using them,
+    so they must not be modified.
+    """
+    if None not in _recipients:
+        _recipients[None] = RecipientFilter()
+    return _recipients[None]
+
+
+def team_recipients(team):
+    """Returns a cached filter of the players in a team."""
+    if team not in _recipients:
+        _recipients[team] = RecipientFilter(*[
+            index for index in PlayerIter()
+            if PlayerEntity(index).team == team
+        ])
+    return _recipients[team]
+
+
+def nearby_recipients(origin, radius):
+    """
+    Returns a filter of the players within a radius of the origin.
+
+    The filter is cached for the rest of the tick.
+    """
+    key = (origin.x, origin.y, origin.z, radius)
+    if key not in _nearby_recipients:
+        _nearby_recipients[key] = RecipientFilter(*[
+            player.index for _, player
+            in get_nearby_players(origin, radius, grid=player_grid)
+        ])
+    return _nearby_recipients[key]
+
+
+def register_models(*paths):
+    """Registers models to be precached whenever a map starts."""
+    _registered_models.update(paths)
+
+
+def _iter_effect_classes(cls):
+    """Iterates over an effect class' subclasses recursively."""
+    for subclass in cls.__subclasses__():
+        yield subclass
+        yield from _iter_effect_classes(subclass)
+
+
+def precache_models():
+    """
+    Precaches the registered models and the models used by all effect
+    classes and instances, so sending an effect never has to.
+    """
+    paths = set(_registered_models)
+    effects = list(_iter_effect_classes(_EffectBase)) + list(_model_effects)
+    for effect in effects:
+        position = effect._model_position
+        if position is not None and isinstance(effect._values[position], str):
+            paths.add(effect._values[position])
+    for path in paths:
+        _model_indexes[path]
+
+
+def get_effect_budget():
+    """Returns the active EffectBudget, or None."""
+    return _budget
+
+
+def set_effect_budget(budget):
+    """Sets the EffectBudget limiting the effects sent, or None."""
+    global _budget
+    _budget = budget
+
+
+def _send(effect_class, recipients, values):
+    """Sends an effect's values, unless the budget throttles it."""
+
+    # Update model's path to the model's index
+    position = effect_class._model_position
+    if position is not None:
+        model = values[position]
+        if model and isinstance(model, str):
+            values[position] = _model_indexes[model]
+
+    if _budget is not None:
+        recipients = _budget.allow(effect_class, recipients, values)
+        if recipients is None:
+            return
+    effect_class.function(recipients, *values)
+
+
+def _invalidate_recipients(game_event=None):
+    """
+    Removes the cached recipient filters now and on the next tick,
+    after the player or team change has taken place.
+    """
+    global _invalidate_recipients_next_tick
+    _recipients.clear()
+    _nearby_recipients.clear()
+    _invalidate_recipients_next_tick = True
+
+
 # ======================================================================
 # >> CLASSES
 # ======================================================================
 
-class _EffectBase:
+class _EffectBase(metaclass=_EffectMeta):
     """
     Xtend's effects make it much easier to use the Source.Python's
     default effects, allowing the effects to be wrapped into instances
@@ -72,29 +370,45 @@ class _EffectBase:
 
     There's no need to pass all the arguments everytime when the default
     values for the arguments are held in the effect objects.
+
+    Each class' args are compiled into a list of values in the
+    function's argument order, so a call only patches the given
+    arguments into a copy of the list.
     """
 
     function = None
     args = OrderedDict()
 
+    # What EffectBudget does with the effect when over budget:
+    # 'drop', 'defer' to the next tick, or 'collapse' it with the other
+    # effects with the same collapse_args values and recipients, keeping
+    # the one with the largest collapse_size_args values for next tick
+    budget_policy = 'drop'
+    collapse_args = ()
+    collapse_size_args = ()
+
     def __init__(self, *args, **kwargs):
         """Initializes a new effect."""
-        self.args = self.args.copy()
-        _update_ordered_dict(self.args, args, kwargs)
+        self._values = list(self._values)
+        _bind_arguments(self._positions, self._values, args, kwargs)
+        if self._model_position is not None:
+            _model_effects.add(self)
 
     def __call__(self, recipients=None, *args, **kwargs):
         """Sends the effect."""
-        recipients = RecipientFilter() if recipients is None else recipients
-        arguments = self.args.copy()
-        _update_ordered_dict(arguments, args, kwargs)
+        recipients = all_recipients() if recipients is None else recipients
+        values = list(self._values)
+        if args or kwargs:
+            _bind_arguments(self._positions, values, args, kwargs)
 
-        # Update model's path to the model's index
-        model = arguments.get('model')
-        if model and isinstance(model, str):
-            arguments['model'] = _model_indexes[model]
+        for recorder in _recorders:
+            recorder.record(self._effect_class, values)
 
-        # Call the function
-        self.function(recipients, *arguments.values())
+        # Send the effect, or leave it to the active batch
+        if _batches:
+            _batches[-1].add(self._effect_class, recipients, values)
+        else:
+            _send(self._effect_class, recipients, values)
 
     @classmethod
     def direct(cls, recipients=None, *args, **kwargs):
@@ -102,6 +416,213 @@ class _EffectBase:
         cls.__call__(cls, recipients, *args, **kwargs)
 
 
+class EffectBatch:
+    """
+    Collects effects and sends them together.
+
+    All effects sent inside the batch's with block are collected
+    instead of being sent right away. Exact duplicates sent to the same
+    recipients are dropped, and the effects are sent grouped by their
+    recipients, using one filter per group.
+
+    The batch is sent when the with block exits, or on the next tick
+    if the batch was created with defer=True.
+    """
+
+    def __init__(self, defer=False):
+        """Initializes a new EffectBatch instance."""
+        self.defer = defer
+        self._groups = OrderedDict()
+        self._filter_keys = {}
+
+    def __len__(self):
+        """Returns the amount of effects in the batch."""
+        return sum(len(effects) for _, effects in self._groups.values())
+
+    def __enter__(self):
+        """Starts collecting the effects sent inside the with block."""
+        _batches.append(self)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stops collecting effects and sends or defers them."""
+        _batches.remove(self)
+        if exc_type is not None:
+            return
+        if self.defer:
+            _deferred_batches.append(self)
+        else:
+            self.flush()
+
+    def _get_group(self, recipients):
+        """Gets the group of effects sent to the recipients."""
+        # Filters are kept referenced, so their ids can't be reused
+        filter_key = id(recipients)
+        if filter_key in self._filter_keys:
+            key = self._filter_keys[filter_key][1]
+        else:
+            key = frozenset(recipients)
+            self._filter_keys[filter_key] = (recipients, key)
+        if key not in self._groups:
+            self._groups[key] = (recipients, OrderedDict())
+        return self._groups[key][1]
+
+    def add(self, effect_class, recipients, values):
+        """Adds an effect class' values to the batch."""
+        values, key = _copy_values(values)
+        effects = self._get_group(recipients)
+        key = (effect_class, key)
+        if key not in effects:
+            effects[key] = (effect_class, values)
+
+    def flush(self):
+        """Sends all the collected effects."""
+        groups = self._groups
+        self._groups = OrderedDict()
+        self._filter_keys.clear()
+        for recipients, effects in groups.values():
+            for effect_class, values in effects.values():
+                _send(effect_class, recipients, values)
+
+
+class EffectBudget:
+    """
+    Limits the amount of effects sent per tick, in total and to each
+    recipient.
+
+    Recipients who have reached their limit are left out of the effect's
+    filter. When nobody is left, or the tick's total limit is reached,
+    the effect is handled by its class' budget_policy.
+
+    Collapsed effects are merged per collapse key, so only the largest
+    of them is sent on the next tick. It's dropped instead if an effect
+    at least as large was sent with the same key during the tick.
+
+    The amount of throttled effects is counted in throttled,
+    per (effect class name, action) pair.
+    """
+
+    def __init__(self, per_tick=None, per_recipient=None):
+        """Initializes a new EffectBudget instance."""
+        self.per_tick = per_tick
+        self.per_recipient = per_recipient
+        self.throttled = Counter()
+        self._sent = 0
+        self._recipient_counts = defaultdict(int)
+        self._sent_sizes = {}
+        self._collapsed = {}
+        self._deferred = []
+
+    def _throttle(self, effect_class, recipients, values, action):
+        """
+        Counts a throttled effect and defers it if asked to.
+
+        Deferred effects keep their recipients' indexes, since a cached
+        filter may be replaced by the next tick.
+        """
+        self.throttled[effect_class.__name__, action] += 1
+        if action == 'deferred':
+            values = _copy_values(values)[0]
+            self._deferred.append((effect_class, tuple(recipients), values))
+
+    def _get_collapse_key(self, effect_class, recipients, values):
+        """Returns the key of the effects an effect collapses with."""
+        return effect_class, frozenset(recipients), _copy_values([
+            values[effect_class._positions[name]]
+            for name in effect_class.collapse_args
+        ])[1]
+
+    def _get_size(self, effect_class, values):
+        """Returns the size collapsed effects are compared by."""
+        return max((
+            values[effect_class._positions[name]]
+            for name in effect_class.collapse_size_args
+        ), default=0)
+
+    def _collapse(self, effect_class, recipients, values):
+        """
+        Merges an effect into the largest one with its collapse key,
+        unless an effect as large was already sent with the key.
+        """
+        key = self._get_collapse_key(effect_class, recipients, values)
+        size = self._get_size(effect_class, values)
+        sent_size = self._sent_sizes.get(key)
+        if sent_size is not None and size <= sent_size:
+            return
+        collapsed = self._collapsed.get(key)
+        if collapsed is None or size > collapsed[0]:
+            self._collapsed[key] = (
+                size, tuple(recipients), _copy_values(values)[0])
+
+    def allow(self, effect_class, recipients, values):
+        """
+        Returns the filter an effect can be sent to,
+        or None if the effect was throttled.
+        """
+        policy = effect_class.budget_policy
+
+        # Leave out the recipients who have reached their limit
+        allowed = recipients
+        if self.per_recipient is not None:
+            counts = self._recipient_counts
+            limit = self.per_recipient
+            indexes = list(recipients)
+            under_limit = [index for index in indexes if counts[index] < limit]
+            if not under_limit:
+                allowed = None
+            elif len(under_limit) < len(indexes):
+                allowed = RecipientFilter(*under_limit)
+
+        if (allowed is None
+                or self.per_tick is not None and self._sent >= self.per_tick):
+            if policy == 'defer':
+                action = 'deferred'
+            elif policy == 'collapse':
+                action = 'collapsed'
+                self._collapse(effect_class, recipients, values)
+            else:
+                action = 'dropped'
+            self._throttle(effect_class, recipients, values, action)
+            return None
+
+        self._sent += 1
+        if self.per_recipient is not None:
+            for index in under_limit:
+                counts[index] += 1
+        if policy == 'collapse':
+            key = self._get_collapse_key(effect_class, allowed, values)
+            size = self._get_size(effect_class, values)
+            sent_size = self._sent_sizes.get(key)
+            if sent_size is None or size > sent_size:
+                self._sent_sizes[key] = size
+        return allowed
+
+    def reset(self):
+        """
+        Starts a new tick and returns the deferred and collapsed effects
+        with new filters of their recipients who are still on the server.
+        """
+        self._sent = 0
+        self._recipient_counts.clear()
+        self._sent_sizes.clear()
+        deferred = self._deferred
+        for (effect_class, _, _), (_, indexes, values) in (
+                self._collapsed.items()):
+            deferred.append((effect_class, indexes, values))
+        self._collapsed.clear()
+        self._deferred = []
+        if not deferred:
+            return deferred
+        present = set(PlayerIter())
+        effects = []
+        for effect_class, indexes, values in deferred:
+            indexes = [index for index in indexes if index in present]
+            if indexes:
+                effects.append(
+                    (effect_class, RecipientFilter(*indexes), values))
+        return effects
+
+
 # ======================================================================
 # >> EFFECTS
 # ======================================================================
@@ -110,8 +631,8 @@ class ArmorRicochet(_EffectBase):
     function = temp_entities.armor_ricochet
     args = OrderedDict([
         ('delay', 0),
-        ('position', Vector()),
-        ('direction', Vector())
+        ('position', _VECTOR),
+        ('direction', _VECTOR)
     ])
 
 
@@ -120,9 +641,9 @@ class BeamEntPoint(_EffectBase):
     args = OrderedDict([
         ('delay', 0),
         ('start_ent_index', 0),
-        ('start_position', Vector()),
+        ('start_position', _VECTOR),
         ('end_ent_index', 0),
-        ('end_position', Vector()),
+        ('end_position', _VECTOR),
         ('model', None),
         ('halo_index', 0),
         ('start_frame', 0),
@@ -185,8 +706,8 @@ class BeamPoints(_EffectBase):
     function = temp_entities.beam_points
     args = OrderedDict([
         ('delay', 0),
-        ('start_position', Vector()),
-        ('end_position', Vector()),
+        ('start_position', _VECTOR),
+        ('end_position', _VECTOR),
         ('model', None),
         ('halo_index', 0),
         ('start_frame', 0),
@@ -229,9 +750,12 @@ class BeamRing(_EffectBase):
 
 class BeamRingPoint(_EffectBase):
     function = temp_entities.beam_ring_point
+    budget_policy = 'collapse'
+    collapse_args = ('origin',)
+    collapse_size_args = ('start_radius', 'end_radius')
     args = OrderedDict([
         ('delay', 0),
-        ('origin', Vector()),
+        ('origin', _VECTOR),
         ('start_radius', 1),
         ('end_radius', 100),
         ('model', None),
@@ -255,8 +779,8 @@ class BloodSprite(_EffectBase):
     function = temp_entities.blood_sprite
     args = OrderedDict([
         ('delay', 0),
-        ('position', Vector()),
-        ('direction', Vector()),
+        ('position', _VECTOR),
+        ('direction', _VECTOR),
         ('red', 0),
         ('green', 0),
         ('blue', 0),
@@ -269,8 +793,8 @@ class BloodStream(_EffectBase):
     function = temp_entities.blood_stream
     args = OrderedDict([
         ('delay', 0),
-        ('position', Vector()),
-        ('direction', Vector()),
+        ('position', _VECTOR),
+        ('direction', _VECTOR),
         ('red', 0),
         ('green', 0),
         ('blue', 0),
@@ -283,10 +807,10 @@ class BreakModel(_EffectBase):
     function = temp_entities.break_model
     args = OrderedDict([
         ('delay', 0),
-        ('position', Vector()),
+        ('position', _VECTOR),
         ('angle', 0),
-        ('size', Vector()),
-        ('velocity', Vector()),
+        ('size', _VECTOR),
+        ('velocity', _VECTOR),
         ('model', None),
         ('randomization', 0),
         ('count', 1),
@@ -298,8 +822,8 @@ class BubbleTrail(_EffectBase):
     function = temp_entities.bubble_trail
     args = OrderedDict([
         ('delay', 0),
-        ('start_position', Vector()),
-        ('end_position', Vector()),
+        ('start_position', _VECTOR),
+        ('end_position', _VECTOR),
         ('water_level', 0),
         ('model', None),
         ('count', 1),
@@ -311,8 +835,8 @@ class Bubbles(_EffectBase):
     function = temp_entities.bubbles
     args = OrderedDict([
         ('delay', 0),
-        ('start_position', Vector()),
-        ('end_position', Vector()),
+        ('start_position', _VECTOR),
+        ('end_position', _VECTOR),
         ('height', 1),
         ('model', None),
         ('count', 1),
@@ -324,7 +848,48 @@ class DispatchEffect(_EffectBase):
     function = temp_entities.dispatch_effect
     args = OrderedDict([
         ('delay', 0),
-        ('position', Vector()),
+        ('position', _VECTOR),
         ('name', ''),
-        ('data', DispatchEffectData())
+        ('data', _DISPATCH_EFFECT_DATA)
     ])
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """Sends the deferred effect batches and expires the tick's filters."""
+    global _invalidate_recipients_next_tick
+    _nearby_recipients.clear()
+    if _invalidate_recipients_next_tick:
+        _recipients.clear()
+        _invalidate_recipients_next_tick = False
+    if _budget is not None:
+        for effect_class, recipients, values in _budget.reset():
+            _send(effect_class, recipients, values)
+    while _deferred_batches:
+        _deferred_batches.pop(0).flush()
+
+
+@LevelInit
+def _on_level_init(map_name):
+    """Resolves the model indexes for the new map ahead of time."""
+    _model_indexes.clear()
+    precache_models()
+
+
+@ClientActive
+def _on_client_active(index):
+    """Removes the cached filters when a player joins."""
+    _invalidate_recipients()
+
+
+@ClientDisconnect
+def _on_client_disconnect(index):
+    """Removes the cached filters when a player leaves."""
+    _invalidate_recipients()
+
+
+event_manager.register_for_event('player_team', _invalidate_recipients)
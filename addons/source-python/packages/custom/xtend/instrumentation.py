@@ -0,0 +1,343 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+import json
+import sys
+
+from bisect import bisect_left
+
+from functools import wraps
+
+from importlib import import_module
+
+from time import perf_counter
+
+# Source.Python
+from commands.server import ServerCommand
+from core import echo_console
+from listeners import Tick
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# (module, class or None, attributes) of the instrumented APIs
+_TARGETS = (
+    ('xtend.players', None, (
+        'get_nearby_players', 'get_nearby_players_many', 'push_players',
+        'push_players_to', 'boost_players_velocity', 'long_jump_players',
+    )),
+    ('xtend.players', 'PlayerEntity', (
+        'add_effect', 'remove_effect', 'clear_effects', 'message',
+        'shift_property', 'shiftprop', 'push', 'push_to', 'boost_velocity',
+        'long_jump', 'get_nearby_players',
+    )),
+    ('xtend.effects', '_EffectBase', ('__call__', 'direct')),
+    ('xtend.effects', 'EffectBatch', ('flush',)),
+    ('xtend.menus', 'PagedMenu', ('send', 'refresh', 'filter', '_select')),
+)
+
+# (module, class or None, attributes) of the engine writes
+_WRITE_TARGETS = (
+    ('xtend.players', None, ('_base_setattr',)),
+    ('xtend.players', 'PlayerEntity', (
+        'set_property_vector', 'ignite', 'ignite_lifetime',
+    )),
+    ('xtend.effects', None, ('_send',)),
+)
+
+# Upper bounds of the per-tick time histogram's buckets, in milliseconds
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 5, 10, 50)
+
+# Caller of the work Xtend does on its own, like flushing deferred writes
+_SERVER = '<server>'
+_OUTSIDE_CALLS = '<outside calls>'
+
+_enabled = False
+_originals = []
+_current = None
+_stats = {}
+_tick_times = {}
+_histograms = {}
+_ticks = 0
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'HISTOGRAM_BUCKETS',
+    'disable',
+    'dump',
+    'enable',
+    'format_stats',
+    'get_stats',
+    'is_enabled',
+    'reset'
+)
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+class _Stats:
+    """Counters of one API's calls from one caller module."""
+
+    __slots__ = ('calls', 'time', 'max_time', 'writes')
+
+    def __init__(self):
+        """Initializes the counters to zero."""
+        self.calls = 0
+        self.time = 0.0
+        self.max_time = 0.0
+        self.writes = 0
+
+
+def _get_stats(api, caller):
+    """Gets the counters of an API and a caller module."""
+    key = (api, caller)
+    stats = _stats.get(key)
+    if stats is None:
+        stats = _stats[key] = _Stats()
+    return stats
+
+
+def _get_caller():
+    """Returns the name of the first calling module outside Xtend."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        name = frame.f_globals.get('__name__', '')
+        if name != 'xtend' and not name.startswith('xtend.'):
+            return name
+        frame = frame.f_back
+    return _SERVER
+
+
+def _instrument(function, api):
+    """
+    Wraps an API function to time its calls.
+
+    Calls made while another instrumented call is running are part of
+    the outer call, so each caller's totals are only counted once.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        global _current
+        if _current is not None:
+            return function(*args, **kwargs)
+        stats = _current = _get_stats(api, _get_caller())
+        start = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = perf_counter() - start
+            _current = None
+            stats.calls += 1
+            stats.time += elapsed
+            if elapsed > stats.max_time:
+                stats.max_time = elapsed
+            _tick_times[api] = _tick_times.get(api, 0) + elapsed
+    return wrapper
+
+
+def _count_writes(function, api):
+    """Wraps an engine write to count it for the running API call."""
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        if _current is not None:
+            _current.writes += 1
+        else:
+            _get_stats(_OUTSIDE_CALLS, _SERVER).writes += 1
+        return function(*args, **kwargs)
+    return wrapper
+
+
+def _patch(targets, wrap):
+    """Replaces the targets with wrapped versions."""
+    for module_name, class_name, names in targets:
+        owner = import_module(module_name)
+        prefix = module_name
+        if class_name is not None:
+            owner = getattr(owner, class_name)
+            prefix += '.' + class_name
+        for name in names:
+            api = prefix + '.' + name
+            original = owner.__dict__.get(name)
+            _originals.append((owner, name, original))
+            if isinstance(original, classmethod):
+                setattr(owner, name, classmethod(
+                    wrap(original.__func__, api)))
+            else:
+                setattr(owner, name, wrap(getattr(owner, name), api))
+
+
+def _add_to_histogram(api, elapsed):
+    """Counts a tick into an API's histogram."""
+    buckets = _histograms.get(api)
+    if buckets is None:
+        buckets = _histograms[api] = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+    buckets[bisect_left(HISTOGRAM_BUCKETS, elapsed * 1000)] += 1
+
+
+def _bucket_label(index):
+    """Returns the label of a histogram bucket."""
+    if index < len(HISTOGRAM_BUCKETS):
+        return '<={0}ms'.format(HISTOGRAM_BUCKETS[index])
+    return '>{0}ms'.format(HISTOGRAM_BUCKETS[-1])
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def is_enabled():
+    """Returns True if the instrumentation is enabled."""
+    return _enabled
+
+
+def enable():
+    """
+    Enables the instrumentation.
+
+    Xtend's APIs and engine writes are only wrapped while enabled,
+    so the instrumentation costs nothing when it's disabled.
+    Module functions a plugin has imported by name before this are
+    not seen, while the methods of Xtend's classes always are.
+    """
+    global _enabled
+    if _enabled:
+        return
+    _patch(_TARGETS, _instrument)
+    _patch(_WRITE_TARGETS, _count_writes)
+    _enabled = True
+
+
+def disable():
+    """Disables the instrumentation, keeping the collected stats."""
+    global _enabled, _current
+    while _originals:
+        owner, name, original = _originals.pop()
+        if original is None:
+            delattr(owner, name)
+        else:
+            setattr(owner, name, original)
+    _tick_times.clear()
+    _current = None
+    _enabled = False
+
+
+def reset():
+    """Clears the collected stats."""
+    global _ticks
+    _stats.clear()
+    _tick_times.clear()
+    _histograms.clear()
+    _ticks = 0
+
+
+def get_stats():
+    """
+    Returns the collected stats as a JSON serializable dictionary.
+
+    The APIs' calls are listed per caller module, from the most
+    time consuming down. The histograms count the ticks by how much
+    time was spent in each API during the tick.
+    """
+    calls = [
+        {
+            'api': api,
+            'caller': caller,
+            'calls': stats.calls,
+            'time': stats.time,
+            'max_time': stats.max_time,
+            'writes': stats.writes,
+        }
+        for (api, caller), stats in _stats.items()
+    ]
+    calls.sort(key=lambda entry: entry['time'], reverse=True)
+    return {
+        'enabled': _enabled,
+        'ticks': _ticks,
+        'calls': calls,
+        'histograms': {
+            api: {
+                _bucket_label(index): count
+                for index, count in enumerate(buckets) if count
+            }
+            for api, buckets in _histograms.items()
+        },
+    }
+
+
+def dump(path):
+    """Dumps the collected stats into a JSON file."""
+    with open(path, 'w') as file:
+        json.dump(get_stats(), file, indent=2, sort_keys=True)
+
+
+def format_stats(limit=20):
+    """Returns the most time consuming calls as a printable table."""
+    stats = get_stats()
+    lines = [
+        'Xtend instrumentation: {0}, {1} ticks'.format(
+            'enabled' if stats['enabled'] else 'disabled', stats['ticks']),
+        '{0:<45} {1:<25} {2:>8} {3:>10} {4:>8}'.format(
+            'API', 'Caller', 'Calls', 'Time (ms)', 'Writes'),
+    ]
+    for entry in stats['calls'][:limit]:
+        lines.append('{0:<45} {1:<25} {2:>8} {3:>10.3f} {4:>8}'.format(
+            entry['api'], entry['caller'], entry['calls'],
+            entry['time'] * 1000, entry['writes']))
+    return '\n'.join(lines)
+
+
+# ======================================================================
+# >> COMMANDS
+# ======================================================================
+
+@ServerCommand('xtend_profile')
+def _profile_command(command):
+    """Controls the instrumentation: on, off, reset, print or dump <path>."""
+    action = command[1] if len(command) > 1 else 'print'
+    if action == 'on':
+        enable()
+        echo_console('Xtend instrumentation enabled.')
+    elif action == 'off':
+        disable()
+        echo_console('Xtend instrumentation disabled.')
+    elif action == 'reset':
+        reset()
+        echo_console('Xtend instrumentation stats cleared.')
+    elif action == 'print':
+        echo_console(format_stats())
+    elif action == 'dump':
+        path = command[2] if len(command) > 2 else 'xtend_profile.json'
+        dump(path)
+        echo_console('Xtend instrumentation stats dumped to {0}.'.format(path))
+    else:
+        echo_console(
+            'Usage: xtend_profile <on|off|reset|print|dump [path]>')
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """Adds the tick's time per API to the histograms."""
+    global _ticks
+    if not _enabled:
+        return
+    _ticks += 1
+    total = 0
+    for api, elapsed in _tick_times.items():
+        total += elapsed
+        _add_to_histogram(api, elapsed)
+    _add_to_histogram('<tick total>', total)
+    _tick_times.clear()
@@ -0,0 +1,134 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from collections import OrderedDict
+
+# Source.Python
+from listeners import ClientActive
+from listeners import ClientDisconnect
+from listeners import ClientSettingsChanged
+
+from players.helpers import get_client_language as _get_client_language
+
+from translations.strings import TranslationStrings
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'clear_translations',
+    'get_client_language',
+    'translate',
+    'translate_for'
+)
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+class _TranslationCache(OrderedDict):
+    """
+    Maps (id of a TranslationStrings, language) to the resolved string.
+
+    The TranslationStrings are kept alive with their strings, so their
+    ids can't be reused. When the cache is full, the least recently
+    used strings are removed first.
+    """
+
+    def __init__(self, max_size=4096):
+        """Initializes a new translation cache."""
+        super().__init__()
+        self.max_size = max_size
+
+    def resolve(self, text, language):
+        """Returns the text in the language, resolving it if needed."""
+        key = (id(text), language)
+        try:
+            string = self[key][1]
+        except KeyError:
+            while len(self) >= self.max_size:
+                self.popitem(last=False)
+            string = text.get_string(language)
+            self[key] = (text, string)
+        else:
+            self.move_to_end(key)
+        return string
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+# Player index -> language
+_languages = {}
+
+_translations = _TranslationCache()
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def get_client_language(player_index):
+    """
+    Returns a player's language. The language is cached until
+    the player changes their settings or leaves.
+    """
+    try:
+        return _languages[player_index]
+    except KeyError:
+        language = _languages[player_index] = _get_client_language(
+            player_index)
+        return language
+
+
+def translate(text, language):
+    """
+    Returns a text in a language, using cached strings for
+    TranslationStrings without tokens.
+    """
+    if not isinstance(text, TranslationStrings):
+        return str(text)
+    if text.tokens:
+        return text.get_string(language)
+    return _translations.resolve(text, language)
+
+
+def translate_for(text, player_index):
+    """Returns a text in a player's language."""
+    return translate(text, get_client_language(player_index))
+
+
+def clear_translations():
+    """
+    Removes the cached strings, for when translations have been
+    edited after they were first used.
+    """
+    _translations.clear()
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@ClientActive
+def _on_client_active(index):
+    """Makes sure a new player doesn't inherit a cached language."""
+    _languages.pop(index, None)
+
+
+@ClientDisconnect
+def _on_client_disconnect(index):
+    """Removes a disconnected player's cached language."""
+    _languages.pop(index, None)
+
+
+@ClientSettingsChanged
+def _on_client_settings_changed(index):
+    """Removes a player's cached language when their settings change."""
+    _languages.pop(index, None)
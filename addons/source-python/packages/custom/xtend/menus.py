@@ -2,27 +2,260 @@
 # >> IMPORTS
 # ======================================================================
 
+# Python 3
+from bisect import bisect_left
+
+from collections import OrderedDict
+
+from math import ceil
+
 # Source.Python
 from menus import PagedMenu as SpPagedMenu
 from menus import PagedOption
 from menus import Text
 
-from menus.base import _translate_text
+from listeners import Tick
 
 from translations.strings import LangStrings
+from translations.strings import TranslationStrings
+
+# Xtend
+from xtend.languages import get_client_language
+from xtend.languages import translate_for
 
 
 # ======================================================================
 # >> GLOBALS
 # ======================================================================
 
-_lang_strings = LangStrings('xtend/menus')
+# Loaded the first time a footer is rendered
+_lang_strings = None
+
+# Rendered footers by (language, has previous, has next)
+_footers = {}
+
+# Attributes that change how a menu is rendered
+_RENDER_ATTRIBUTES = frozenset((
+    'title', 'description', 'constants', 'top_seperator',
+    'bottom_seperator', 'fill', 'display_page_info', 'previous_menu',
+    'next_menu', 'provider', 'option_tags'
+))
+
+# Render cache entries kept per cached page, for a few languages
+_RENDERS_PER_PAGE = 8
+
+# Menus with refreshes waiting for the next tick, by their ids
+_refreshing_menus = {}
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+def _invalidating(method):
+    """Wraps a list method to invalidate the menu's render cache."""
+    def wrapper(self, *args, **kwargs):
+        self._revision += 1
+        return method(self, *args, **kwargs)
+    wrapper.__name__ = method.__name__
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+def _get_lang_strings():
+    """Returns Xtend's menu translations, loading them if needed."""
+    global _lang_strings
+    if _lang_strings is None:
+        _lang_strings = LangStrings('xtend/menus')
+    return _lang_strings
+
+
+def _get_footer(player_index, has_previous, has_next):
+    """
+    Returns the rendered "Previous", "Next" and "Close" options
+    and their selectable slots, shared by all menus.
+    """
+    key = (get_client_language(player_index), has_previous, has_next)
+    if key not in _footers:
+        _footers[key] = _render_footer(player_index, has_previous, has_next)
+    return _footers[key]
+
+
+def _render_footer(player_index, has_previous, has_next):
+    """Renders the "Previous", "Next" and "Close" options."""
+    lang_strings = _get_lang_strings()
+    slots = set()
+
+    # Add "Previous" option
+    option_previous = PagedOption(
+        lang_strings['Previous'],
+        highlight=has_previous,
+        selectable=has_previous
+    )
+    if has_previous:
+        slots.add(8)
+    buffer = option_previous._render(player_index, 8)
+
+    # Add "Next" option
+    option_next = PagedOption(
+        lang_strings['Next'],
+        highlight=has_next,
+        selectable=has_next
+    )
+    if has_next:
+        slots.add(9)
+    buffer += option_next._render(player_index, 9)
+
+    # Add "Close" option
+    option_close = PagedOption(
+        lang_strings['Close'],
+        highlight=False
+    )
+    buffer += option_close._render(player_index, 0)
+
+    return buffer, frozenset(slots)
+
+
+def _hash_menu_data(data):
+    """Returns a hash of a page's rendered message and slots."""
+    slots = data['slots']
+    if not isinstance(slots, int):
+        slots = frozenset(slots)
+    return hash((data['message'], slots))
+
+
+def _get_option_text(option, language):
+    """Returns an option's text in a language."""
+    text = getattr(option, 'text', option)
+    if isinstance(text, TranslationStrings):
+        return text.get_string(language)
+    return str(text)
 
 
 # ======================================================================
 # >> CLASSES
 # ======================================================================
 
+class MenuDataProvider:
+    """
+    Base class for lazily providing a PagedMenu's options.
+
+    Subclasses must implement __len__() to return the total amount of
+    options, and get_options() to return the options in a range.
+    Subclasses that can tell an option's text without creating
+    the option should override get_texts() for faster searches.
+    """
+
+    def __len__(self):
+        """Returns the total amount of options."""
+        raise NotImplementedError
+
+    def get_options(self, start, stop):
+        """Returns the options from start up to stop."""
+        raise NotImplementedError
+
+    def get_texts(self, language):
+        """Returns the texts of all the options in a language."""
+        return [
+            _get_option_text(option, language)
+            for option in self.get_options(0, len(self))
+        ]
+
+
+class SequenceProvider(MenuDataProvider):
+    """
+    Provides options from a sequence of items, creating the options
+    only for the pages that are viewed.
+
+    The factory turns an item into an option. Without a factory
+    the items are used as options as they are. Menus are searched
+    by the items' texts, so searching never runs the factory.
+    """
+
+    def __init__(self, items, factory=None):
+        """Initializes a new SequenceProvider instance."""
+        self.items = items
+        self.factory = factory
+
+    def __len__(self):
+        """Returns the amount of items."""
+        return len(self.items)
+
+    def get_options(self, start, stop):
+        """Returns the options for the items from start up to stop."""
+        items = self.items[start:stop]
+        if self.factory is None:
+            return list(items)
+        return [self.factory(item) for item in items]
+
+    def get_texts(self, language):
+        """Returns the texts of all the items in a language."""
+        return [_get_option_text(item, language) for item in self.items]
+
+
+class _FilteredProvider(MenuDataProvider):
+    """Provides a menu's options at the given positions, without copies."""
+
+    def __init__(self, menu, positions):
+        """Initializes a new view over the menu's options."""
+        self.menu = menu
+        self.positions = positions
+
+    def __len__(self):
+        """Returns the amount of options in the view."""
+        return len(self.positions)
+
+    def get_options(self, start, stop):
+        """Returns the viewed options from start up to stop."""
+        return [
+            self.menu._get_option_at(position)
+            for position in self.positions[start:stop]
+        ]
+
+
+class MenuIndex:
+    """
+    Search index over a menu's options in one language.
+
+    Every word of each option's text is kept in a sorted table, so the
+    options with a word starting with a prefix are found with two
+    binary searches. Tags given by the menu's option_tags callback
+    are mapped straight to the options' positions the first time
+    a tag is looked up, as that needs the options themselves.
+    """
+
+    def __init__(self, texts, get_options=None, option_tags=None):
+        """Builds a new index over the options' texts."""
+        words = []
+        for position, text in enumerate(texts):
+            for word in set(text.lower().split()):
+                words.append((word, position))
+        words.sort()
+        self.words = [word for word, _ in words]
+        self.positions = [position for _, position in words]
+        self.get_options = get_options
+        self.option_tags = option_tags
+        self.tags = None
+
+    def find_prefix(self, prefix):
+        """Returns the sorted positions of options matching the prefix."""
+        prefix = prefix.lower()
+        start = bisect_left(self.words, prefix)
+        stop = bisect_left(self.words, prefix + '\uffff', start)
+        return sorted(set(self.positions[start:stop]))
+
+    def find_tag(self, tag):
+        """Returns the sorted positions of options with the tag."""
+        if self.tags is None:
+            self.tags = {}
+            if self.option_tags is not None:
+                for position, option in enumerate(self.get_options()):
+                    for option_tag in self.option_tags(option):
+                        self.tags.setdefault(option_tag, []).append(
+                            position)
+        return self.tags.get(tag, [])
+
+
 class PagedMenu(SpPagedMenu):
     """
     Extend's Source.Python's default menus package with new features
@@ -31,6 +264,24 @@ class PagedMenu(SpPagedMenu):
     - previous_menu: presssing "Previous" on the first page
     - next_menu: pressing "Next" on the last page
     - display_page_info: Display the page number in top right corner
+
+    Rendered headers, bodies and footers are cached per page and
+    language, and shared by all players with the same language. The
+    cache is invalidated when the menu's options or the attributes it's
+    rendered from are changed. Call invalidate() after changing an
+    option or the constants dict in place. Menus with a build_callback
+    are not cached, since the callback can change them for each player.
+
+    Instead of a list, the data can be a MenuDataProvider that's only
+    asked for the options of the pages players view. Only the
+    cached_pages most recently viewed pages are kept in memory.
+
+    Live menus should be updated with refresh(), which renders the menu
+    again on the next tick, also noticing options changed in place, and
+    only resends it to players whose rendered page has changed.
+
+    filter() returns a paged view of the options matching a prefix or a
+    tag, looked up from a MenuIndex built once per language.
     """
 
     def __init__(
@@ -39,8 +290,21 @@ class PagedMenu(SpPagedMenu):
             top_seperator='-' * 30, bottom_seperator='-' * 30, fill=False,
             # Xtend's parameters
             constants=None, previous_menu=None, next_menu=None,
-            display_page_info=True):
+            display_page_info=True, cached_pages=16):
         """Initializes a new PagedMenu instance."""
+        self._revision = 0
+        self._cache_revision = 0
+        self._render_cache = OrderedDict()
+        self._page_cache = OrderedDict()
+        self.provider = None
+        if isinstance(data, MenuDataProvider):
+            self.provider = data
+            data = None
+        self.cached_pages = cached_pages
+        self.option_tags = None
+        self._indexes = {}
+        self._refresh_indexes = set()
+        self._refresh_all = False
         super().__init__(
             data, select_callback, build_callback,
             description, title, top_seperator, bottom_seperator, fill
@@ -50,12 +314,104 @@ class PagedMenu(SpPagedMenu):
         self.next_menu = next_menu
         self.display_page_info = display_page_info
 
+    def __setattr__(self, attr, value):
+        """Invalidates the render cache when a rendered attribute changes."""
+        if attr in _RENDER_ATTRIBUTES:
+            self._revision += 1
+        super().__setattr__(attr, value)
+
+    append = _invalidating(list.append)
+    extend = _invalidating(list.extend)
+    insert = _invalidating(list.insert)
+    remove = _invalidating(list.remove)
+    pop = _invalidating(list.pop)
+    clear = _invalidating(list.clear)
+    sort = _invalidating(list.sort)
+    reverse = _invalidating(list.reverse)
+    __setitem__ = _invalidating(list.__setitem__)
+    __delitem__ = _invalidating(list.__delitem__)
+    __iadd__ = _invalidating(list.__iadd__)
+    __imul__ = _invalidating(list.__imul__)
+
+    def invalidate(self):
+        """Invalidates the rendered pages after an in place change."""
+        self._revision += 1
+
+    def _check_revision(self):
+        """Clears the caches if the menu has changed since they were made."""
+        if self._cache_revision != self._revision:
+            self._render_cache.clear()
+            self._page_cache.clear()
+            self._indexes.clear()
+            self._cache_revision = self._revision
+
+    def _get_cache(self, part, player_index, page):
+        """
+        Returns the render cache key for a part of a player's page,
+        and the cached render or None.
+        """
+        self._check_revision()
+        key = (part, page.index, get_client_language(player_index))
+        if self.build_callback is not None:
+            return key, None
+        return key, self._render_cache.get(key)
+
+    def _set_cache(self, key, value):
+        """Caches a render, removing the oldest ones when full."""
+        if self.build_callback is not None:
+            return value
+        cache = self._render_cache
+        cache[key] = value
+        while len(cache) > max(self.cached_pages, 1) * _RENDERS_PER_PAGE:
+            cache.popitem(last=False)
+        return value
+
+    @property
+    def page_count(self):
+        """Returns the amount of pages the menu has."""
+        if self.provider is None:
+            return super().page_count
+        return ceil(len(self.provider) / self._get_max_item_count()) or 1
+
+    def _get_options(self, page_index):
+        """Returns the options on a page."""
+        if self.provider is None:
+            return super()._get_options(page_index)
+        self._check_revision()
+        cache = self._page_cache
+        if page_index in cache:
+            cache.move_to_end(page_index)
+            return cache[page_index]
+        count = self._get_max_item_count()
+        start = page_index * count
+        options = cache[page_index] = self.provider.get_options(
+            start, start + count)
+        while len(cache) > self.cached_pages:
+            cache.popitem(last=False)
+        return options
+
+    def _get_constant_layout(self):
+        """Returns the constant options by slot from 0 to 8, or None."""
+        layout = self._render_cache.get('layout')
+        if layout is None:
+            layout = self._set_cache('layout', tuple(
+                self.constants.get(choice_index) for choice_index in range(9)))
+        return layout
+
     def _get_max_item_count(self):
         """Returns the maximum possible item count per page."""
         return 7 - len(self.constants)
 
     def _format_header(self, player_index, page, slots):
         """Prepares the header for the menu."""
+        key, buffer = self._get_cache('header', player_index, page)
+        if buffer is None:
+            buffer = self._set_cache(
+                key, self._render_header(player_index, page))
+        return buffer
+
+    def _render_header(self, player_index, page):
+        """Renders the header for the menu."""
 
         # Create the page info string
         info = ''
@@ -64,7 +420,7 @@ class PagedMenu(SpPagedMenu):
 
         if self.title:
             buffer = '{0}{1}\n'.format(
-                _translate_text(self.title, player_index), info
+                translate_for(self.title, player_index), info
             )
         elif info:
             buffer = '{0}\n'.format(info)
@@ -73,7 +429,7 @@ class PagedMenu(SpPagedMenu):
 
         # Set description if present
         if self.description is not None:
-            buffer += _translate_text(self.description, player_index) + '\n'
+            buffer += translate_for(self.description, player_index) + '\n'
 
         # Set the top seperator if present
         if self.top_seperator is not None:
@@ -83,11 +439,27 @@ class PagedMenu(SpPagedMenu):
 
     def _format_body(self, player_index, page, slots):
         """Prepares the body for the menu."""
+        key, cached = self._get_cache('body', player_index, page)
+        if cached is None:
+            options = {}
+            body_slots = set()
+            buffer = self._render_body(
+                player_index, page.index, options, body_slots)
+            cached = self._set_cache(key, (buffer, options, body_slots))
+        buffer, options, body_slots = cached
+        page.options.clear()
+        page.options.update(options)
+        slots.update(body_slots)
+        return buffer
+
+    def _render_body(self, player_index, page_index, page_options, slots):
+        """Renders the body for the menu."""
         buffer = ''
 
         # Get all the options for the current page
-        options = self._get_options(page.index)
+        options = self._get_options(page_index)
         option_iter = iter(options)
+        layout = self._get_constant_layout()
 
         # Loop through numbers from 1 to 7
         choice_index = 0
@@ -97,18 +469,17 @@ class PagedMenu(SpPagedMenu):
             choice_index += 1
 
             # See if there's a constant option for that number
-            if choice_index in self.constants:
-                option = self.constants[choice_index]
+            option = layout[choice_index]
 
             # Else pick the next option from the page
-            else:
+            if option is None:
                 try:
                     option = next(option_iter)
                 except StopIteration:
                     continue  # In case there are constants left
 
             # Add the option to page's options
-            page.options[choice_index] = option
+            page_options[choice_index] = option
 
             # Add the option's text like SP's PagedMenu does
             if isinstance(option, PagedOption):
@@ -136,39 +507,117 @@ class PagedMenu(SpPagedMenu):
         if self.bottom_seperator is not None:
             buffer += '{0}\n'.format(self.bottom_seperator)
 
-        # Add "Previous" option
-        option_previous = PagedOption(
-            _lang_strings['Previous'],
-            self.previous_menu,
-            highlight=False,
-            selectable=False
+        # Add the shared "Previous", "Next" and "Close" options
+        footer, footer_slots = _get_footer(
+            player_index,
+            page.index > 0 or bool(self.previous_menu),
+            page.index < self.last_page_index or bool(self.next_menu)
         )
-        if page.index > 0 or self.previous_menu:
-            option_previous.highlight = option_previous.selectable = True
-            slots.add(8)
-        buffer += option_previous._render(player_index, 8)
-
-        # Add "Next" option
-        option_next = PagedOption(
-            _lang_strings['Next'],
-            self.next_menu,
-            highlight=False,
-            selectable=False
-        )
-        if page.index < self.last_page_index or self.next_menu:
-            option_next.highlight = option_next.selectable = True
-            slots.add(9)
-        buffer += option_next._render(player_index, 9)
-
-        # Add "Close" option
-        option_close = PagedOption(
-            _lang_strings['Close'],
-            highlight=False
+        slots.update(footer_slots)
+        return buffer + footer
+
+    def _get_option_at(self, position):
+        """Returns the option at a position of the menu's data."""
+        if self.provider is None:
+            return self[position]
+        return self.provider.get_options(position, position + 1)[0]
+
+    def _get_all_options(self):
+        """Returns all the options of the menu's data."""
+        if self.provider is None:
+            return list(self)
+        return self.provider.get_options(0, len(self.provider))
+
+    def get_index(self, language):
+        """Returns the menu's search index for a language."""
+        self._check_revision()
+        if language not in self._indexes:
+            if self.provider is None:
+                texts = [
+                    _get_option_text(option, language) for option in self]
+            else:
+                texts = self.provider.get_texts(language)
+            self._indexes[language] = MenuIndex(
+                texts, self._get_all_options, self.option_tags)
+        return self._indexes[language]
+
+    def filter(self, player_index, prefix=None, tag=None):
+        """
+        Returns a new menu showing the options that have a word starting
+        with the prefix in the player's language, and the tag if given.
+        """
+        index = self.get_index(get_client_language(player_index))
+        positions = None
+        if prefix is not None:
+            positions = index.find_prefix(prefix)
+        if tag is not None:
+            tagged = index.find_tag(tag)
+            if positions is None:
+                positions = tagged
+            else:
+                tagged = set(tagged)
+                positions = [p for p in positions if p in tagged]
+        if positions is None:
+            positions = range(
+                len(self) if self.provider is None else len(self.provider))
+        return PagedMenu(
+            _FilteredProvider(self, positions),
+            self.select_callback, None, self.description, self.title,
+            self.top_seperator, self.bottom_seperator, self.fill,
+            self.constants, display_page_info=self.display_page_info,
+            cached_pages=self.cached_pages
         )
-        buffer += option_close._render(player_index, 0)
 
-        # Return the buffer
-        return buffer
+    def refresh(self, *player_indexes):
+        """
+        Resends the menu on the next tick to the given players, or to
+        everyone viewing it, if their rendered page has changed.
+        """
+        if player_indexes:
+            self._refresh_indexes.update(player_indexes)
+        else:
+            self._refresh_all = True
+        _refreshing_menus[id(self)] = self
+
+    def _get_menu_data(self, player_index):
+        """
+        Returns the menu data of a player's page, and remembers its hash
+        so refresh() can tell if the page has changed.
+        """
+        page = self._player_pages[player_index]
+        data = getattr(page, 'refreshed_data', None)
+        if data is None:
+            data = super()._get_menu_data(player_index)
+        page.refreshed_data = None
+        page.rendered_hash = _hash_menu_data(data)
+        return data
+
+    def _flush_refresh(self):
+        """Resends the menu to the players whose page has changed."""
+        if self._refresh_all:
+            player_indexes = list(self._player_pages)
+        else:
+            player_indexes = list(self._refresh_indexes)
+        self._refresh_indexes.clear()
+        self._refresh_all = False
+
+        # Options may have been changed in place, so render them again
+        self._render_cache.clear()
+
+        for player_index in player_indexes:
+            if player_index not in self._player_pages:
+                continue
+            page = self._player_pages[player_index]
+            data = super()._get_menu_data(player_index)
+            if getattr(page, 'rendered_hash', None) == _hash_menu_data(data):
+                continue
+
+            # Send the data that was just rendered
+            page.refreshed_data = data
+            try:
+                self._refresh(player_index)
+            finally:
+                page.refreshed_data = None
 
     def _select(self, player_index, choice_index):
         """Handles a menu selection."""
@@ -207,3 +656,14 @@ class PagedMenu(SpPagedMenu):
 
         # Let the super class handle the rest
         return super()._select(player_index, choice_index)
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """Resends the refreshed menus to players whose page has changed."""
+    while _refreshing_menus:
+        _refreshing_menus.popitem()[1]._flush_refresh()
@@ -2,6 +2,11 @@
 # >> IMPORTS
 # ======================================================================
 
+# Python 3
+from math import sqrt
+
+from operator import itemgetter
+
 # Source.Python
 import players.entity
 
@@ -9,30 +14,391 @@ from filters.players import PlayerIter
 
 from messages import SayText2
 
-from listeners.tick import tick_delays
-
 from entities.constants import MoveType
 
+from hooks.exceptions import except_hooks
+
+from listeners import ClientActive
+from listeners import ClientDisconnect
+from listeners import LevelInit
+from listeners import Tick
+
+from mathlib import Vector
+
+# Xtend
+from xtend.timers import scheduler
+
 
 # ======================================================================
 # >> FUNCTIONS
 # ======================================================================
 
-def get_nearby_players(p_vector, radius, is_filters=None, not_filters=None):
-    """Gets a list of players near a vector, sorted by distance."""
-    players = {}
+def get_nearby_players(
+        p_vector, radius, is_filters=None, not_filters=None, grid=None):
+    """
+    Gets a list of (distance, player) pairs near a vector,
+    sorted by distance.
+
+    If a PlayerGrid is given, only players in the grid cells near
+    the vector are looked at.
+    """
+    if grid is not None:
+        pairs = grid.query(
+            p_vector, radius, grid.get_indexes(is_filters, not_filters))
+    else:
+        x, y, z = p_vector.x, p_vector.y, p_vector.z
+        radius_sq = radius * radius
+        pairs = []
+        for index in PlayerIter(is_filters, not_filters):
+            origin = PlayerEntity(index).get_origin()
+            distance_sq = (
+                (origin.x - x) ** 2 + (origin.y - y) ** 2
+                + (origin.z - z) ** 2)
+            if distance_sq <= radius_sq:
+                pairs.append((distance_sq, index))
+        pairs.sort(key=itemgetter(0))
+    return [
+        (sqrt(distance_sq), PlayerEntity(index))
+        for distance_sq, index in pairs
+    ]
+
+
+def get_nearby_players_many(
+        p_vectors, radii, is_filters=None, not_filters=None, grid=None):
+    """
+    Gets a list of (distance, player) pairs near each of the vectors,
+    sorted by distance.
+
+    Radii can be a single radius for all vectors or one per vector.
+    Player origins are only collected once for all of the vectors.
+    """
+    if isinstance(radii, (int, float)):
+        radii = [radii] * len(p_vectors)
+    if grid is not None:
+        return [
+            get_nearby_players(
+                p_vector, radius, is_filters, not_filters, grid)
+            for p_vector, radius in zip(p_vectors, radii)
+        ]
+
+    # Collect the players and their coordinates once
+    players = []
+    coordinates = []
     for index in PlayerIter(is_filters, not_filters):
         player = PlayerEntity(index)
-        distance = p_vector.get_distance(player.get_origin())
-        if distance <= radius:
-            players[distance] = player
-    return sorted(players)
+        origin = player.get_origin()
+        players.append(player)
+        coordinates.append((origin.x, origin.y, origin.z))
+    positions = range(len(players))
+
+    results = []
+    for p_vector, radius in zip(p_vectors, radii):
+        x, y, z = p_vector.x, p_vector.y, p_vector.z
+        radius_sq = radius * radius
+        distances = [
+            (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+            for px, py, pz in coordinates
+        ]
+        pairs = sorted(
+            (distance_sq, position)
+            for distance_sq, position in zip(distances, positions)
+            if distance_sq <= radius_sq
+        )
+        results.append([
+            (sqrt(distance_sq), players[position])
+            for distance_sq, position in pairs
+        ])
+    return results
+
+
+def flush_writes():
+    """Writes all the pending deferred property writes to the players."""
+    while _pending_writes:
+        index, pending = _pending_writes.popitem()
+        player = PlayerEntity._instances.get(index)
+        if player is None:
+            continue
+        for attr, value in pending.items():
+            _base_setattr(player, attr, value)
+
+
+def enable_deferred_writes():
+    """
+    Buffers attribute writes to the players' properties until the next
+    tick (or until flush_writes() is called), so only the last value
+    gets written. Reads of a buffered attribute return its pending
+    value, which is only looked up while deferred writes are enabled.
+    """
+    PlayerEntity.deferred_writes = True
+    PlayerEntity.__getattr__ = _get_pending_attribute
+
+
+def disable_deferred_writes():
+    """Flushes the pending writes and writes directly again."""
+    flush_writes()
+    PlayerEntity.deferred_writes = False
+    if '__getattr__' in PlayerEntity.__dict__:
+        del PlayerEntity.__getattr__
+
+
+def _get_pending_attribute(player, attr):
+    """Returns a pending deferred write before the actual value."""
+    pending = _pending_writes.get(player.index)
+    if pending is not None and attr in pending:
+        return pending[attr]
+    return _base_getattr(player, attr)
+
+
+def _set_entity_attribute(player, attr, value):
+    """Sets an entity attribute, or buffers it for deferred writing."""
+    if player.deferred_writes:
+        index = player.index
+        if index in _pending_writes:
+            _pending_writes[index][attr] = value
+        else:
+            _pending_writes[index] = {attr: value}
+    else:
+        _base_setattr(player, attr, value)
+
+
+def push_players(players, vectors):
+    """
+    Pushes many players along one vector or a vector per player.
+
+    The vectors are written as they are, without any copies.
+    """
+    name = PlayerEntity.BASE_VELOCITY
+    if isinstance(vectors, Vector):
+        for player in players:
+            player.set_property_vector(name, vectors)
+    else:
+        for player, vector in zip(players, vectors):
+            player.set_property_vector(name, vector)
+
+
+def push_players_to(players, vector, force):
+    """Pushes many players towards a point vector with a force."""
+    name = PlayerEntity.BASE_VELOCITY
+    x, y, z = vector.x, vector.y, vector.z
+    velocity = Vector()  # Reused, the engine copies the values
+    for player in players:
+        origin = player.get_origin()
+        velocity.x = (x - origin.x) * force
+        velocity.y = (y - origin.y) * force
+        velocity.z = (z - origin.z) * force
+        player.set_property_vector(name, velocity)
+
+
+def boost_players_velocity(
+        players, x_multiplier=1, y_multiplier=1, z_multiplier=1):
+    """Boosts many players' velocities."""
+    name = PlayerEntity.BASE_VELOCITY
+    for player in players:
+        velocity = player.get_property_vector(name)
+        velocity.x *= x_multiplier
+        velocity.y *= y_multiplier
+        velocity.z *= z_multiplier
+        player.set_property_vector(name, velocity)
+
+
+def long_jump_players(players, multiplier):
+    """Boosts many players' horizontal velocities to jump longer."""
+    boost_players_velocity(players, multiplier, multiplier)
+
+
+def update_proximity_zones():
+    """Updates all proximity zones from the player grid."""
+    for zone in list(_zones):
+        if zone in _zones:
+            zone._update(player_grid)
+
+
+def register_effect_type(name, movetype=None, priority=0):
+    """
+    Registers an effect type for PlayerEntity.add_effect().
+
+    When multiple effects with a move type are active on a player,
+    the one with the highest priority decides the player's move type.
+    Re-registering an existing name updates its move type and priority.
+    """
+    if name in _effect_types:
+        effect_type = _effect_types[name]
+    else:
+        effect_type = _EffectType(name, 1 << len(_effect_types))
+        _effect_types[name] = effect_type
+    effect_type.movetype = movetype
+    effect_type.priority = priority
+    _movetype_cache.clear()
+    return effect_type
+
+
+def _get_effect_type(name):
+    """Gets an effect type, registering unknown names without a move type."""
+    if name in _effect_types:
+        return _effect_types[name]
+    return register_effect_type(name)
+
+
+def _get_filters_key(filters):
+    """Returns a hashable key of PlayerIter filters."""
+    if filters is None:
+        return None
+    if isinstance(filters, str):
+        return (filters,)
+    return tuple(filters)
+
+
+def _resolve_movetype(mask):
+    """Resolves the move type for a bitmask of active effects."""
+    if mask in _movetype_cache:
+        return _movetype_cache[mask]
+    winner = None
+    for effect_type in _effect_types.values():
+        if (mask & effect_type.bit and effect_type.movetype is not None
+                and (winner is None or effect_type.priority > winner.priority)):
+            winner = effect_type
+    movetype = MoveType.WALK if winner is None else winner.movetype
+    _movetype_cache[mask] = movetype
+    return movetype
 
 
 # ======================================================================
 # >> CLASSES
 # ======================================================================
 
+class _EffectType:
+    """An effect type's bit in the effect mask and its move type."""
+
+    __slots__ = ('name', 'bit', 'movetype', 'priority')
+
+    def __init__(self, name, bit, movetype=None, priority=0):
+        """Initializes a new effect type."""
+        self.name = name
+        self.bit = bit
+        self.movetype = movetype
+        self.priority = priority
+
+
+class PlayerGrid:
+    """
+    Uniform grid of player origins used to speed up radius queries.
+
+    The grid is rebuilt at most once per tick, on the first query after
+    it has been invalidated. Queries then only look at the cells that
+    the radius overlaps and compare squared distances.
+
+    Like the origins, the players matching each pair of filters are
+    only looked up once per rebuild.
+    """
+
+    def __init__(self, cell_size=256):
+        """Initializes a new PlayerGrid instance."""
+        self.cell_size = cell_size
+        self._cells = {}
+        self._entries = []
+        self._positions = {}
+        self._filtered = {}
+        self._dirty = True
+
+    def invalidate(self):
+        """Marks the grid to be rebuilt on its next query."""
+        self._dirty = True
+
+    def refresh(self):
+        """Rebuilds the grid from the players' current origins."""
+        size = self.cell_size
+        cells = {}
+        entries = []
+        positions = {}
+        for index in PlayerIter():
+            origin = PlayerEntity(index).get_origin()
+            entry = (index, origin.x, origin.y, origin.z)
+            entries.append(entry)
+            positions[index] = entry
+            key = (origin.x // size, origin.y // size, origin.z // size)
+            if key in cells:
+                cells[key].append(entry)
+            else:
+                cells[key] = [entry]
+        self._cells = cells
+        self._entries = entries
+        self._positions = positions
+        self._filtered = {}
+        self._dirty = False
+
+    def get_indexes(self, is_filters=None, not_filters=None):
+        """
+        Returns a set of the indexes of the players matching the filters,
+        or None if no filters are given.
+        """
+        if is_filters is None and not_filters is None:
+            return None
+        if self._dirty:
+            self.refresh()
+        key = (_get_filters_key(is_filters), _get_filters_key(not_filters))
+        indexes = self._filtered.get(key)
+        if indexes is None:
+            indexes = self._filtered[key] = set(
+                PlayerIter(is_filters, not_filters))
+        return indexes
+
+    def _get_candidates(self, x, y, z, radius):
+        """Returns the entries of all cells the radius overlaps."""
+        size = self.cell_size
+        reach = int(radius // size) + 1
+        if (2 * reach + 1) ** 3 >= len(self._cells):
+            return self._entries
+        cells = self._cells
+        cx, cy, cz = x // size, y // size, z // size
+        candidates = []
+        for dx in range(-reach, reach + 1):
+            for dy in range(-reach, reach + 1):
+                for dz in range(-reach, reach + 1):
+                    key = (cx + dx, cy + dy, cz + dz)
+                    if key in cells:
+                        candidates.extend(cells[key])
+        return candidates
+
+    def query(self, p_vector, radius, indexes=None):
+        """
+        Gets a list of (squared distance, index) pairs near a vector,
+        sorted by distance.
+
+        If indexes is given, only players in it are returned.
+        """
+        if self._dirty:
+            self.refresh()
+        x, y, z = p_vector.x, p_vector.y, p_vector.z
+        radius_sq = radius * radius
+        pairs = []
+        for index, px, py, pz in self._get_candidates(x, y, z, radius):
+            if indexes is not None and index not in indexes:
+                continue
+            distance_sq = (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2
+            if distance_sq <= radius_sq:
+                pairs.append((distance_sq, index))
+        pairs.sort(key=itemgetter(0))
+        return pairs
+
+    def get_position(self, index):
+        """Returns a player's (x, y, z) origin in the grid, or None."""
+        if self._dirty:
+            self.refresh()
+        entry = self._positions.get(index)
+        return None if entry is None else entry[1:]
+
+    def within(self, x, y, z, radius):
+        """Returns a set of the indexes of the players near a point."""
+        if self._dirty:
+            self.refresh()
+        radius_sq = radius * radius
+        return {
+            index
+            for index, px, py, pz in self._get_candidates(x, y, z, radius)
+            if (px - x) ** 2 + (py - y) ** 2 + (pz - z) ** 2 <= radius_sq
+        }
+
+
 class PlayerEntity(players.entity.PlayerEntity):
     """
     Xtend's PlayerEntity adds new functionality and features to
@@ -40,65 +406,187 @@ class PlayerEntity(players.entity.PlayerEntity):
 
     Xtends allows proper multi-interaction with move types as well
     as multiple new methods to make it easier to control the players.
+
+    Instances are cached per index until the player disconnects,
+    the index is taken by a new player or the map changes.
+
+    Attribute writes to the player's properties can be buffered until
+    the next tick with enable_deferred_writes().
     """
 
+    # Xtend's own per-player state. The base class keeps its __dict__,
+    # so the slots don't make the wrapper smaller: they keep Xtend's
+    # state apart from the entity's and are set without routing.
+    __slots__ = (
+        '_effects', '_effect_timers', '_effect_mask', '_movetype',
+        '_burning'
+    )
+
     _instances = {}
+    _setters = None
     BASE_VELOCITY = 'CBasePlayer.localdata.m_vecBaseVelocity'
 
+    # Networked properties Xtend itself writes to
+    _NETWORKED_PROPERTIES = ('movetype',)
+
+    deferred_writes = False
+
     def __new__(cls, index, *args, **kwargs):
         """Creates a new Xtend's PlayerEntity instance."""
         if index in cls._instances:
             return cls._instances[index]
+        if cls.__dict__.get('_setters') is None:
+            cls._build_setters()
         self = super().__new__(cls, index)
         cls._instances[index] = self
-        self._effects = []
+        self._effects = {}
+        self._effect_timers = {}
+        self._effect_mask = 0
+        self._movetype = None
         self._burning = False  # Prevent flame animation from flashing
         return self
 
-    def __setattr__(self, attr, value):
-        """Override BaseEntity's way of setting only properties."""
-        if attr.startswith('_'):
-            object.__setattr__(self, attr, value)
+    @classmethod
+    def _invalidate(cls, index):
+        """Removes a cached instance and cancels its effect timers."""
+        self = cls._instances.pop(index, None)
+        _pending_writes.pop(index, None)
+        if self is None:
+            return
+        for timer in self._effect_timers.values():
+            timer.cancel()
+        self._effect_timers.clear()
+
+    @classmethod
+    def _invalidate_all(cls):
+        """Removes all the cached instances."""
+        for index in list(cls._instances):
+            cls._invalidate(index)
+
+    @classmethod
+    def _build_setters(cls):
+        """Builds the class' table of attribute setters."""
+        cls._setters = {}
+        for attr in cls.__slots__:
+            cls._setters[attr] = object.__setattr__
+        for attr in cls._NETWORKED_PROPERTIES:
+            cls._route_attribute(attr)
+
+    @classmethod
+    def _route_attribute(cls, attr):
+        """Resolves and caches the setter for an attribute."""
+        if (attr.startswith('_')
+                or hasattr(getattr(cls, attr, None), '__set__')):
+            setter = object.__setattr__
         else:
-            super().__setattr__(attr, value)
+            setter = _set_entity_attribute
+        cls._setters[attr] = setter
+        return setter
+
+    def __setattr__(self, attr, value):
+        """
+        Override BaseEntity's way of setting only properties.
+
+        Private attributes and descriptors are set on the instance
+        directly, everything else is passed on to BaseEntity.
+        The decision is cached per class and attribute name.
+        """
+        try:
+            setter = self._setters[attr]
+        except KeyError:
+            setter = type(self)._route_attribute(attr)
+        setter(self, attr, value)
 
     def _apply_effects(self):
-        """Applies effects properly to a player."""
-        if 'noclip' in self._effects:
-            self.movetype = MoveType.NOCLIP
-        elif 'freeze' in self._effects:
-            self.movetype = MoveType.NONE
-        elif 'jetpack' in self._effects:
-            self.movetype = MoveType.JETPACK
-        else:
-            self.movetype = MoveType.WALK
-        if 'burn' in self._effects:
-            self.ignite()
-            self._burning = True
+        """
+        Applies effects properly to a player.
+
+        The player's properties are only written when the resolved
+        move type or burn state differs from what Xtend last applied.
+        """
+        movetype = _resolve_movetype(self._effect_mask)
+        if movetype != self._movetype:
+            self.movetype = movetype
+            self._movetype = movetype
+        if self._effect_mask & _burn_effect.bit:
+            if not self._burning:
+                self.ignite()
+                self._burning = True
         elif self._burning:  # Prevent flame animation from flashing
             self.ignite_lifetime(0)
             self._burning = False
 
+    def _increment_effect(self, effect):
+        """Increments an effect's reference count."""
+        count = self._effects.get(effect, 0)
+        self._effects[effect] = count + 1
+        if not count:
+            self._effect_mask |= _get_effect_type(effect).bit
+            self._apply_effects()
+
+    def _decrement_effect(self, effect):
+        """Decrements an effect's reference count."""
+        count = self._effects.get(effect, 0)
+        if count > 1:
+            self._effects[effect] = count - 1
+        elif count:
+            del self._effects[effect]
+            self._effect_mask &= ~_effect_types[effect].bit
+            self._apply_effects()
+
+    def _expire_effect(self, effect):
+        """Removes an effect whose duration has ended."""
+        if self._effect_timers.pop(effect, None) is None:
+            return
+        self._decrement_effect(effect)
+
     def add_effect(self, effect, duration=None):
-        """Adds a new effect to a player."""
-        self._effects.append(effect)
-        if duration is not None:
-            tick_delays.delay(duration, self.remove_effect, effect)
-        self._apply_effects()
+        """
+        Adds a new effect to a player.
+
+        An effect with a duration holds a single reference to the effect
+        until it expires. Re-applying it before that only extends the
+        expiry. The effect's Timer is returned, or None without duration.
+        """
+        if duration is None:
+            self._increment_effect(effect)
+            return None
+        timer = self._effect_timers.get(effect)
+        if timer is not None:
+            timer.extend(duration)
+            return timer
+        timer = scheduler.delay(duration, self._expire_effect, effect)
+        self._effect_timers[effect] = timer
+        self._increment_effect(effect)
+        return timer
 
     def remove_effect(self, effect):
-        """Removes a effect from a player."""
-        if effect in self._effects:
-            self._effects.remove(effect)
-        self._apply_effects()
+        """
+        Removes a effect from a player.
+
+        References without a duration are removed first, and the timed
+        reference is only cancelled once it's the last one left.
+        """
+        timer = self._effect_timers.get(effect)
+        if timer is not None and self._effects[effect] == 1:
+            timer.cancel()
+            del self._effect_timers[effect]
+        self._decrement_effect(effect)
 
     def clear_effects(self, effect=None):
         """Clears effects from a player."""
         if effect is not None:
-            while effect in self._effects:
-                self._effects.remove(effect)
+            timer = self._effect_timers.pop(effect, None)
+            if timer is not None:
+                timer.cancel()
+            if self._effects.pop(effect, 0):
+                self._effect_mask &= ~_effect_types[effect].bit
         else:
+            for timer in self._effect_timers.values():
+                timer.cancel()
+            self._effect_timers.clear()
             self._effects.clear()
+            self._effect_mask = 0
         self._apply_effects()
 
     freeze = lambda self, duration: self.add_effect('freeze', duration)
@@ -118,10 +606,22 @@ class PlayerEntity(players.entity.PlayerEntity):
         SayText2(message=message).send(self.index)
 
     def shift_property(self, prop_name, shift, duration=None):
-        """Shifts a property's value."""
+        """
+        Shifts a property's value.
+
+        With a duration, the Timer that shifts the value back is
+        returned. Cancelling it leaves the property shifted.
+        """
         setattr(self, prop_name, getattr(self, prop_name) + shift)
         if duration is not None:
-            tick_delays.delay(duration, self.shift_property, prop_name, -shift)
+            return scheduler.delay(
+                duration, self._unshift_property, prop_name, shift)
+        return None
+
+    def _unshift_property(self, prop_name, shift):
+        """Shifts a property back, unless the player is gone."""
+        if self._instances.get(self.index) is self:
+            self.shift_property(prop_name, -shift)
 
     shiftprop = shift_property
 
@@ -145,7 +645,157 @@ class PlayerEntity(players.entity.PlayerEntity):
         """Boost player's horizontal velocity to jump longer."""
         self.boost_velocity(multiplier, multiplier)
 
-    def get_nearby_players(self, radius, is_filters=None, not_filters=None):
+    def get_nearby_players(
+            self, radius, is_filters=None, not_filters=None, grid=None):
         """Gets players within a radius sorted by their distance."""
         return get_nearby_players(
-            self.get_origin(), radius, is_filters, not_filters)
+            self.get_origin(), radius, is_filters, not_filters, grid)
+
+
+class ProximityZone:
+    """
+    Area around a point or a player that calls back when players
+    enter or leave it.
+
+    All zones are updated once per tick from the player grid's shared
+    snapshot of origins, and the callback is only called for players
+    whose membership has changed since the last tick, with the zone,
+    the player and True for entering or False for leaving.
+
+    The source is either a Vector or a player. A player source moves
+    the zone with the player and is left out of the zone, and the zone
+    is removed when the player disconnects or the map changes.
+    Only players matching is_filters and not_filters are inside the
+    zone, as with get_nearby_players(). The matching players are
+    looked up once per tick for all zones with the same filters.
+    Disconnected players are dropped without a callback. Exceptions
+    raised by the callback are printed and don't stop the other zones.
+    """
+
+    def __init__(
+            self, source, radius, callback,
+            is_filters=None, not_filters=None):
+        """Initializes and registers a new zone."""
+        self.source = source
+        self.radius = radius
+        self.callback = callback
+        self.is_filters = is_filters
+        self.not_filters = not_filters
+        self._inside = set()
+        _zones.append(self)
+
+    @property
+    def inside(self):
+        """Returns the indexes of the players inside the zone."""
+        return frozenset(self._inside)
+
+    @property
+    def is_active(self):
+        """Returns True if the zone hasn't been removed."""
+        return self in _zones
+
+    def remove(self):
+        """Removes the zone without calling the callback."""
+        if self in _zones:
+            _zones.remove(self)
+        self._inside.clear()
+
+    def _update(self, grid):
+        """Updates the players inside and calls back for the changes."""
+        source = self.source
+        if isinstance(source, Vector):
+            inside = grid.within(source.x, source.y, source.z, self.radius)
+        else:
+            position = grid.get_position(source.index)
+            if position is None:
+                inside = set()
+            else:
+                inside = grid.within(*position, radius=self.radius)
+                inside.discard(source.index)
+        indexes = grid.get_indexes(self.is_filters, self.not_filters)
+        if indexes is not None:
+            inside &= indexes
+        entered = inside - self._inside
+        left = self._inside - inside
+        self._inside = inside
+        for index in left:
+            self._call(index, False)
+        for index in entered:
+            self._call(index, True)
+
+    def _call(self, index, entered):
+        """
+        Calls the callback, printing its exception instead of letting
+        it stop the other zones and Xtend's tick.
+        """
+        try:
+            self.callback(self, PlayerEntity(index), entered)
+        except Exception:
+            except_hooks.print_exception()
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+player_grid = PlayerGrid()
+
+_base_getattr = players.entity.PlayerEntity.__getattr__
+_base_setattr = players.entity.PlayerEntity.__setattr__
+_pending_writes = {}
+
+_effect_types = {}
+_movetype_cache = {}
+
+_zones = []
+
+register_effect_type('noclip', MoveType.NOCLIP, 30)
+register_effect_type('freeze', MoveType.NONE, 20)
+register_effect_type('jetpack', MoveType.JETPACK, 10)
+_burn_effect = register_effect_type('burn')
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """
+    Invalidates the player grid, updates the proximity zones
+    and flushes the deferred writes.
+    """
+    player_grid.invalidate()
+    if _zones:
+        update_proximity_zones()
+    flush_writes()
+
+
+@ClientActive
+def _on_client_active(index):
+    """Makes sure a new player doesn't inherit a cached instance."""
+    PlayerEntity._invalidate(index)
+
+
+@ClientDisconnect
+def _on_client_disconnect(index):
+    """Removes a disconnected player's cached instance and zones."""
+    PlayerEntity._invalidate(index)
+    player_grid.invalidate()
+    for zone in list(_zones):
+        if not isinstance(zone.source, Vector) and zone.source.index == index:
+            zone.remove()
+        else:
+            zone._inside.discard(index)
+
+
+@LevelInit
+def _on_level_init(map_name):
+    """Removes all the cached instances and players' zones on map change."""
+    PlayerEntity._invalidate_all()
+    player_grid.invalidate()
+    for zone in list(_zones):
+        if isinstance(zone.source, Vector):
+            zone._inside.clear()
+        else:
+            zone.remove()
@@ -0,0 +1,413 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from struct import Struct
+from struct import error as StructError
+
+# Source.Python
+from listeners import Tick
+from mathlib import Vector
+
+# Xtend
+import xtend.effects
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+_MAGIC = b'XTFX'
+_VERSION = 1
+
+_header = Struct('<4sB')
+_frame_header = Struct('<IH')
+_byte = Struct('<B')
+_short = Struct('<H')
+_long = Struct('<I')
+
+# Struct formats of the value type tags
+_formats = {
+    'b': '?',  # bool
+    'i': 'i',  # int
+    'l': 'q',  # int outside the 32-bit range
+    'f': 'f',  # float
+    'v': '3f',  # Vector
+    's': 'H',  # str, index in the recording's string table
+    'n': '',  # None
+}
+
+# Vector arguments moved by the playback offset
+_POSITION_ARGS = frozenset((
+    'position', 'origin', 'start_position', 'end_position'
+))
+
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1
+_LONG_MIN, _LONG_MAX = -2 ** 63, 2 ** 63 - 1
+
+_tick_count = 0
+_playbacks = []
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'EffectPlayback',
+    'EffectRecorder',
+    'EffectRecording'
+)
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+def _get_tag(value):
+    """
+    Returns the type tag of an effect argument's value,
+    or None if the value can't be recorded.
+    """
+    if value is None:
+        return 'n'
+    if isinstance(value, bool):
+        return 'b'
+    if isinstance(value, int):
+        if _INT_MIN <= value <= _INT_MAX:
+            return 'i'
+        if _LONG_MIN <= value <= _LONG_MAX:
+            return 'l'
+        return None
+    if isinstance(value, float):
+        return 'f'
+    if isinstance(value, Vector):
+        return 'v'
+    if isinstance(value, str):
+        return 's'
+    return None
+
+
+def _get_class_path(effect_class):
+    """Returns the importable path of an effect class."""
+    return '{0}:{1}'.format(effect_class.__module__, effect_class.__qualname__)
+
+
+def _find_class(path):
+    """
+    Finds an effect class by its importable path among the loaded
+    effect classes. Nothing is imported for a recording.
+    """
+    for effect_class in xtend.effects._iter_effect_classes(
+            xtend.effects._EffectBase):
+        if _get_class_path(effect_class) == path:
+            return effect_class
+    raise ValueError('Unknown effect class: {0}'.format(path))
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class _Layout:
+    """
+    Binary layout of one effect class' values with given value types.
+
+    Each layout precompiles its Struct and a plan for turning the
+    unpacked fields back into the effect function's arguments.
+    """
+
+    __slots__ = ('effect_class', 'signature', 'struct', 'plan')
+
+    def __init__(self, effect_class, signature):
+        """Initializes a new layout."""
+        self.effect_class = effect_class
+        self.signature = signature
+        self.struct = Struct('<' + ''.join(_formats[t] for t in signature))
+
+        # (type tag, index of the first field, is moved by offset)
+        self.plan = []
+        field = 0
+        for name, tag in zip(effect_class._names, signature):
+            self.plan.append((tag, field, name in _POSITION_ARGS))
+            field += 3 if tag == 'v' else 0 if tag == 'n' else 1
+
+    def pack(self, values, get_string_id):
+        """Packs the values into bytes."""
+        fields = []
+        for tag, value in zip(self.signature, values):
+            if tag == 'v':
+                fields.extend((value.x, value.y, value.z))
+            elif tag == 's':
+                fields.append(get_string_id(value))
+            elif tag != 'n':
+                fields.append(value)
+        return self.struct.pack(*fields)
+
+    def unpack(self, data, position, strings, offset):
+        """Unpacks the values from the data at the position."""
+        fields = self.struct.unpack_from(data, position)
+        values = []
+        for tag, field, is_position in self.plan:
+            if tag == 'v':
+                x, y, z = fields[field:field + 3]
+                if is_position and offset is not None:
+                    x += offset.x
+                    y += offset.y
+                    z += offset.z
+                values.append(Vector(x, y, z))
+            elif tag == 's':
+                values.append(strings[fields[field]])
+            elif tag == 'n':
+                values.append(None)
+            else:
+                values.append(fields[field])
+        return values
+
+
+class EffectRecording:
+    """
+    A compact binary recording of effects and the ticks they were sent on.
+
+    Frames are stored packed in a bytearray, each with its tick offset and
+    the id of the layout its values were packed with. Strings such as
+    model paths are stored once in a string table.
+
+    Effects with values that can't be packed, such as DispatchEffectData,
+    are left out of the recording and counted in skipped.
+    """
+
+    def __init__(self):
+        """Initializes a new, empty recording."""
+        self.length = 0
+        self.skipped = 0
+        self._layouts = []
+        self._layout_ids = {}
+        self._strings = []
+        self._string_ids = {}
+        self._frames = bytearray()
+
+    def __len__(self):
+        """Returns the size of the recorded frames in bytes."""
+        return len(self._frames)
+
+    def _get_string_id(self, string):
+        """Gets a string's index in the string table."""
+        if string not in self._string_ids:
+            self._string_ids[string] = len(self._strings)
+            self._strings.append(string)
+        return self._string_ids[string]
+
+    def _get_layout_id(self, effect_class, signature):
+        """Gets the id of a layout, creating the layout if needed."""
+        key = (effect_class, signature)
+        if key not in self._layout_ids:
+            self._layout_ids[key] = len(self._layouts)
+            self._layouts.append(_Layout(effect_class, signature))
+        return self._layout_ids[key]
+
+    def append(self, tick, effect_class, values):
+        """
+        Appends an effect's values sent on a tick to the recording.
+        Returns False if the values can't be recorded.
+        """
+        tags = [_get_tag(value) for value in values]
+        if None in tags:
+            self.skipped += 1
+            return False
+        try:
+            layout_id = self._get_layout_id(effect_class, ''.join(tags))
+            payload = self._layouts[layout_id].pack(
+                values, self._get_string_id)
+            header = _frame_header.pack(tick, layout_id)
+        except StructError:
+            self.skipped += 1
+            return False
+        self._frames += header
+        self._frames += payload
+        self.length = max(self.length, tick + 1)
+        return True
+
+    def iter_frames(self, offset=None):
+        """
+        Iterates over the recorded (tick, effect class, values) frames,
+        moving the positions by the offset vector.
+        """
+        data = self._frames
+        layouts = self._layouts
+        strings = self._strings
+        position = 0
+        end = len(data)
+        while position < end:
+            tick, layout_id = _frame_header.unpack_from(data, position)
+            position += _frame_header.size
+            layout = layouts[layout_id]
+            yield tick, layout.effect_class, layout.unpack(
+                data, position, strings, offset)
+            position += layout.struct.size
+
+    def to_bytes(self):
+        """Returns the recording serialized into bytes."""
+        data = bytearray(_header.pack(_MAGIC, _VERSION))
+        data += _short.pack(len(self._layouts))
+        for layout in self._layouts:
+            path = _get_class_path(layout.effect_class).encode('utf-8')
+            data += _byte.pack(len(path)) + path
+            signature = layout.signature.encode('ascii')
+            data += _byte.pack(len(signature)) + signature
+        data += _short.pack(len(self._strings))
+        for string in self._strings:
+            encoded = string.encode('utf-8')
+            data += _short.pack(len(encoded)) + encoded
+        data += _long.pack(self.length)
+        data += self._frames
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Creates a recording from serialized bytes."""
+        magic, version = _header.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError('Not an Xtend effect recording')
+        position = _header.size
+
+        def read(struct):
+            nonlocal position
+            value = struct.unpack_from(data, position)[0]
+            position += struct.size
+            return value
+
+        def read_bytes(length):
+            nonlocal position
+            value = bytes(data[position:position + length])
+            position += length
+            return value
+
+        self = cls()
+        for _ in range(read(_short)):
+            effect_class = _find_class(read_bytes(read(_byte)).decode('utf-8'))
+            signature = read_bytes(read(_byte)).decode('ascii')
+            self._get_layout_id(effect_class, signature)
+        for _ in range(read(_short)):
+            self._get_string_id(read_bytes(read(_short)).decode('utf-8'))
+        self.length = read(_long)
+        self._frames = bytearray(data[position:])
+        return self
+
+    def save(self, path):
+        """Saves the recording into a file."""
+        with open(path, 'wb') as file:
+            file.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Loads a recording from a file."""
+        with open(path, 'rb') as file:
+            return cls.from_bytes(file.read())
+
+    def play(self, recipients=None, offset=None, delay=0):
+        """
+        Starts playing the recording on the next tick.
+
+        Positions are moved by the offset vector if one is given,
+        and the playback can be delayed by an amount of ticks.
+        """
+        return EffectPlayback(self, recipients, offset, delay)
+
+
+class EffectPlayback:
+    """
+    Playback of an EffectRecording.
+
+    Frames are unpacked from the recording as their ticks come up,
+    and sent straight to the effect functions.
+    """
+
+    def __init__(self, recording, recipients=None, offset=None, delay=0):
+        """Initializes and starts a new playback."""
+        self.recording = recording
+        self.recipients = recipients
+        self._tick = -delay - 1
+        self._frames = recording.iter_frames(offset)
+        self._next_frame = next(self._frames, None)
+        _playbacks.append(self)
+
+    @property
+    def is_playing(self):
+        """Returns True if the playback hasn't finished or been stopped."""
+        return self in _playbacks
+
+    def stop(self):
+        """Stops the playback."""
+        if self in _playbacks:
+            _playbacks.remove(self)
+
+    def _advance(self):
+        """Sends the frames of the next tick."""
+        self._tick += 1
+        recipients = self.recipients
+        if recipients is None:
+            recipients = xtend.effects.all_recipients()
+        frame = self._next_frame
+        while frame is not None and frame[0] <= self._tick:
+            _, effect_class, values = frame
+            xtend.effects._send(effect_class, recipients, values)
+            frame = next(self._frames, None)
+        self._next_frame = frame
+        if frame is None:
+            self.stop()
+
+
+class EffectRecorder:
+    """
+    Records the effects sent while it's running into an EffectRecording.
+
+    Effects are recorded with the resolved values they are sent with,
+    and with the tick they were sent on, counted from the start.
+    """
+
+    def __init__(self):
+        """Initializes a new EffectRecorder instance."""
+        self.recording = None
+        self._start_tick = 0
+
+    def __enter__(self):
+        """Starts recording."""
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Stops recording."""
+        self.stop()
+
+    def start(self):
+        """Starts a new recording."""
+        self.recording = EffectRecording()
+        self._start_tick = _tick_count
+        if self not in xtend.effects._recorders:
+            xtend.effects._recorders.append(self)
+
+    def stop(self):
+        """Stops recording and returns the recording."""
+        if self in xtend.effects._recorders:
+            xtend.effects._recorders.remove(self)
+        return self.recording
+
+    def record(self, effect_class, values):
+        """Records an effect's values."""
+        self.recording.append(
+            _tick_count - self._start_tick, effect_class, values)
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """Counts the ticks and advances the playbacks."""
+    global _tick_count
+    _tick_count += 1
+    for playback in list(_playbacks):
+        playback._advance()
@@ -0,0 +1,143 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from functools import lru_cache
+
+from math import cos
+from math import pi
+from math import sin
+
+# Source.Python
+from mathlib import Vector
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'circle',
+    'cone',
+    'draw',
+    'grid',
+    'polyline',
+    'sphere'
+)
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+@lru_cache(maxsize=32)
+def _unit_circle(segments):
+    """Returns the points of a unit circle on the xy-plane."""
+    step = 2 * pi / segments
+    return tuple((cos(i * step), sin(i * step)) for i in range(segments))
+
+
+@lru_cache(maxsize=32)
+def _unit_circle_edges(segments):
+    """Returns the edges of a unit circle on the xy-plane."""
+    points = _unit_circle(segments)
+    return tuple(
+        ((x1, y1, 0), (x2, y2, 0))
+        for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+    )
+
+
+@lru_cache(maxsize=32)
+def _unit_sphere_edges(rings, segments):
+    """Returns the edges of a unit sphere's latitudes and longitudes."""
+    points = _unit_circle(segments)
+    latitudes = [
+        (sin(i * pi / rings), cos(i * pi / rings)) for i in range(rings + 1)
+    ]
+    edges = []
+
+    # Latitude circles, leaving out the poles
+    for radius, z in latitudes[1:-1]:
+        edges.extend(
+            ((x1 * radius, y1 * radius, z), (x2 * radius, y2 * radius, z))
+            for (x1, y1), (x2, y2) in zip(points, points[1:] + points[:1])
+        )
+
+    # Longitude arcs from pole to pole
+    for x, y in points:
+        edges.extend(
+            ((x * r1, y * r1, z1), (x * r2, y * r2, z2))
+            for (r1, z1), (r2, z2) in zip(latitudes, latitudes[1:])
+        )
+    return tuple(edges)
+
+
+def _transform(edges, center, scale_xy, scale_z):
+    """Scales unit edges and moves them to the center."""
+    cx, cy, cz = center.x, center.y, center.z
+    return [
+        ((cx + x1 * scale_xy, cy + y1 * scale_xy, cz + z1 * scale_z),
+         (cx + x2 * scale_xy, cy + y2 * scale_xy, cz + z2 * scale_z))
+        for (x1, y1, z1), (x2, y2, z2) in edges
+    ]
+
+
+# ======================================================================
+# >> FUNCTIONS
+# ======================================================================
+
+def circle(center, radius, segments=32):
+    """Returns the edges of a horizontal circle."""
+    return _transform(_unit_circle_edges(segments), center, radius, 1)
+
+
+def sphere(center, radius, rings=8, segments=16):
+    """Returns the edges of a sphere's latitudes and longitudes."""
+    return _transform(
+        _unit_sphere_edges(rings, segments), center, radius, radius)
+
+
+def cone(apex, radius, height, segments=16):
+    """
+    Returns the edges of a cone whose base is height units below
+    the apex. A negative height makes the cone point down.
+    """
+    base = Vector(apex.x, apex.y, apex.z - height)
+    edges = circle(base, radius, segments)
+    point = (apex.x, apex.y, apex.z)
+    edges.extend((point, start) for start, _ in edges[:segments])
+    return edges
+
+
+def grid(origin, size, cells=4):
+    """Returns the edges of a horizontal square grid starting at origin."""
+    x, y, z = origin.x, origin.y, origin.z
+    step = size / cells
+    edges = []
+    for i in range(cells + 1):
+        offset = i * step
+        edges.append(((x + offset, y, z), (x + offset, y + size, z)))
+        edges.append(((x, y + offset, z), (x + size, y + offset, z)))
+    return edges
+
+
+def polyline(points):
+    """Returns the edges between consecutive points."""
+    coordinates = [(point.x, point.y, point.z) for point in points]
+    return list(zip(coordinates, coordinates[1:]))
+
+
+def draw(effect, edges, recipients=None, **kwargs):
+    """
+    Draws edges with an effect that has start and end positions,
+    such as BeamPoints.
+
+    The same two vectors are reused for every edge, since the effect
+    functions and EffectBatch copy their values.
+    """
+    start = Vector()
+    end = Vector()
+    for (start.x, start.y, start.z), (end.x, end.y, end.z) in edges:
+        effect(
+            recipients, start_position=start, end_position=end, **kwargs)
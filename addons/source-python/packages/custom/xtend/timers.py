@@ -0,0 +1,152 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from heapq import heappop
+from heapq import heappush
+
+from itertools import count
+
+from time import time
+
+# Source.Python
+from listeners import Tick
+
+
+# ======================================================================
+# >> ALL DECLARATION
+# ======================================================================
+
+__all__ = (
+    'Scheduler',
+    'Timer',
+    'scheduler'
+)
+
+
+# ======================================================================
+# >> CLASSES
+# ======================================================================
+
+class Timer:
+    """
+    Handle to a callback scheduled with a Scheduler.
+
+    Timers can be cancelled, or have their expiry moved without
+    scheduling the callback a second time.
+    """
+
+    __slots__ = (
+        'expires', 'callback', 'args', 'active', '_scheduler', '_entry')
+
+    def __init__(self, scheduler, expires, callback, args):
+        """Initializes a new Timer instance."""
+        self.expires = expires
+        self.callback = callback
+        self.args = args
+        self.active = True
+        self._scheduler = scheduler
+        self._entry = None
+
+    @property
+    def remaining(self):
+        """Returns the time left until the timer expires."""
+        return max(self.expires - time(), 0)
+
+    def cancel(self):
+        """Cancels the timer so its callback is never called."""
+        self.active = False
+
+    def reschedule(self, duration):
+        """Makes the timer expire after a duration from now."""
+        expires = time() + duration
+        if expires < self.expires:
+            self.expires = expires
+            self._scheduler._push(self)
+        else:
+            self.expires = expires
+
+    def extend(self, duration):
+        """Makes sure the timer doesn't expire before the duration."""
+        self.expires = max(self.expires, time() + duration)
+
+
+class Scheduler:
+    """
+    Heap based scheduler for Xtend's timed callbacks.
+
+    All timers due by the time the scheduler is run are fired together
+    as one batch. Each timer only has one valid heap entry: a timer whose
+    expiry was moved later is pushed back when its entry comes up, and
+    entries of cancelled timers are simply dropped.
+    """
+
+    def __init__(self):
+        """Initializes a new Scheduler instance."""
+        self._heap = []
+        self._counter = count()
+
+    def __len__(self):
+        """Returns the amount of entries in the heap."""
+        return len(self._heap)
+
+    def _push(self, timer):
+        """Pushes a timer's current expiry to the heap."""
+        timer._entry = next(self._counter)
+        heappush(self._heap, (timer.expires, timer._entry, timer))
+
+    def delay(self, duration, callback, *args):
+        """Calls a callback after a duration and returns its Timer."""
+        timer = Timer(self, time() + duration, callback, args)
+        self._push(timer)
+        return timer
+
+    def run(self, now=None):
+        """Fires all the timers that have expired."""
+        heap = self._heap
+        if now is None:
+            now = time()
+        if not heap or heap[0][0] > now:
+            return
+
+        # Collect the whole batch before firing any of the callbacks
+        due = []
+        while heap and heap[0][0] <= now:
+            _, entry, timer = heappop(heap)
+            if timer.active and entry == timer._entry:
+                due.append((entry, timer))
+
+        # Callbacks can cancel or move the batch's later timers, so each
+        # timer is only checked right before it would fire
+        for position, (entry, timer) in enumerate(due):
+            if not timer.active or entry != timer._entry:
+                continue
+            if timer.expires > now:
+                self._push(timer)
+                continue
+            timer.active = False
+            try:
+                timer.callback(*timer.args)
+            except Exception:
+                for entry, timer in due[position + 1:]:
+                    if timer.active and entry == timer._entry:
+                        self._push(timer)
+                raise
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+scheduler = Scheduler()
+
+
+# ======================================================================
+# >> LISTENERS
+# ======================================================================
+
+@Tick
+def _on_tick():
+    """Fires the expired timers of Xtend's scheduler."""
+    scheduler.run()
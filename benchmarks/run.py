@@ -0,0 +1,465 @@
+"""
+Offline benchmarks of Xtend's hot paths.
+
+Xtend is imported on top of the Source.Python stand-ins in
+benchmarks/standins, so the benchmarks run on any machine with
+Python 3, without a game server:
+
+    python benchmarks/run.py
+    python benchmarks/run.py --players 32 64 nearby nearby_grid
+    python benchmarks/run.py --instrumented effect_call
+    python benchmarks/run.py --imports
+
+Each benchmark is run with every simulated player count, and reports
+its operations per second and the memory one operation allocates
+(the tracemalloc peak over the operation, averaged).
+"""
+
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tracemalloc
+
+from collections import OrderedDict
+
+from time import perf_counter
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_PATHS = [
+    os.path.join(_ROOT, 'benchmarks', 'standins'),
+    os.path.join(_ROOT, 'addons', 'source-python', 'packages', 'custom'),
+]
+sys.path[:0] = _PATHS
+
+# Source.Python stand-ins
+import listeners
+import players.entity
+import standin_server
+
+from effects import temp_entities
+from filters.recipients import RecipientFilter
+from mathlib import Vector
+from menus import PagedOption
+from menus.base import sent
+
+# Xtend
+import xtend.instrumentation
+
+from xtend.effects import BeamRingPoint
+from xtend.menus import PagedMenu
+from xtend.players import PlayerEntity
+from xtend.players import ProximityZone
+from xtend.players import get_nearby_players
+from xtend.players import player_grid
+from xtend.players import update_proximity_zones
+
+
+# ======================================================================
+# >> GLOBALS
+# ======================================================================
+
+PLAYER_COUNTS = (16, 32, 64, 128)
+
+# Size of the square the simulated players are spread over
+WORLD_SIZE = 4096
+
+XTEND_MODULES = (
+    'xtend.timers', 'xtend.players', 'xtend.effects', 'xtend.recordings',
+    'xtend.shapes', 'xtend.menus', 'xtend.instrumentation',
+)
+
+# Imported before timing an Xtend module, as Source.Python already is
+STANDIN_MODULES = (
+    'commands.server', 'core', 'effects', 'engines.precache',
+    'entities.constants', 'events.manager', 'filters.players',
+    'filters.recipients', 'listeners', 'mathlib', 'menus', 'menus.base',
+    'messages', 'players.entity', 'players.helpers', 'translations.strings',
+)
+
+# Times one import in a new interpreter
+_IMPORT_SCRIPT = """
+import sys
+from importlib import import_module
+from time import perf_counter
+sys.path[:0] = {paths!r}
+for name in {standins!r}:
+    import_module(name)
+start = perf_counter()
+import_module(sys.argv[1])
+print(perf_counter() - start)
+"""
+
+_benchmarks = OrderedDict()
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+def benchmark(name):
+    """
+    Registers a benchmark.
+
+    The decorated function is called with the amount of players,
+    and returns the operation to measure.
+    """
+    def decorator(setup):
+        _benchmarks[name] = setup
+        return setup
+    return decorator
+
+
+def setup_server(player_count):
+    """Fills the server with players and clears Xtend's caches."""
+    standin_server.reset()
+    rng = random.Random(player_count)
+    for index in range(1, player_count + 1):
+        standin_server.add_player(
+            index,
+            origin=(
+                rng.uniform(0, WORLD_SIZE), rng.uniform(0, WORLD_SIZE), 0),
+            team=2 + index % 2,
+            language='fi' if index % 4 == 0 else 'en',
+        )
+    listeners.fire('LevelInit', 'de_benchmark')
+
+
+def measure(operation, min_time):
+    """Returns the operations per second and bytes allocated per op."""
+    operation()
+
+    # Find an amount of operations that takes long enough to time
+    iterations = 1
+    while True:
+        start = perf_counter()
+        for _ in range(iterations):
+            operation()
+        elapsed = perf_counter() - start
+        if elapsed >= min_time:
+            break
+        iterations *= 2
+
+    samples = min(iterations, 100)
+    allocated = _trace_allocations(operation, samples)
+    overhead = _trace_allocations(_no_operation, samples)
+    return iterations / elapsed, max(allocated - overhead, 0)
+
+
+def measure_import(module_name, repeat):
+    """
+    Returns the best time of importing a module in a new interpreter,
+    with the Source.Python stand-ins already imported.
+    """
+    script = _IMPORT_SCRIPT.format(paths=_PATHS, standins=STANDIN_MODULES)
+    env = dict(os.environ)
+    env.pop('PYTHONDONTWRITEBYTECODE', None)
+    times = []
+    for _ in range(repeat + 1):  # The first run writes the bytecode
+        output = subprocess.check_output(
+            [sys.executable, '-c', script, module_name], env=env)
+        times.append(float(output))
+    return min(times[1:])
+
+
+def _trace_allocations(operation, samples):
+    """Returns the average tracemalloc peak of an operation."""
+    peaks = 0
+    tracemalloc.start()
+    try:
+        for _ in range(samples):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            operation()
+            peaks += tracemalloc.get_traced_memory()[1] - current
+    finally:
+        tracemalloc.stop()
+    return peaks / samples
+
+
+def _no_operation():
+    """Operation for measuring tracemalloc's own allocations."""
+
+
+# ======================================================================
+# >> LEGACY IMPLEMENTATIONS
+# ======================================================================
+# Xtend's original implementations of rewritten hot paths, to compare
+# the current ones against.
+
+class _LegacyPlayerEntity(players.entity.PlayerEntity):
+    """PlayerEntity with the original startswith() attribute routing."""
+
+    def __setattr__(self, attr, value):
+        if attr.startswith('_'):
+            object.__setattr__(self, attr, value)
+        else:
+            super().__setattr__(attr, value)
+
+
+def _update_ordered_dict(ordered_dict, args, kwargs):
+    if len(args) > len(ordered_dict):
+        raise IndexError('Too many arguments given')
+    keys = list(ordered_dict.keys())
+    for i, v in enumerate(args):
+        ordered_dict[keys[i]] = v
+    ordered_dict.update(kwargs)
+
+
+class _LegacyBeamRingPoint:
+    """BeamRingPoint with the original OrderedDict based arguments."""
+
+    function = temp_entities.beam_ring_point
+    args = OrderedDict([
+        ('delay', 0),
+        ('origin', Vector()),
+        ('start_radius', 1),
+        ('end_radius', 100),
+        ('model', None),
+        ('halo_index', 0),
+        ('start_frame', 0),
+        ('frame_rate', 255),
+        ('life', 1),
+        ('width', 1),
+        ('spread', 1),
+        ('amplitude', 0),
+        ('red', 0),
+        ('green', 0),
+        ('blue', 0),
+        ('alpha', 255),
+        ('speed', 1),
+        ('flags', 0)
+    ])
+
+    def __init__(self, *args, **kwargs):
+        self.args = self.args.copy()
+        _update_ordered_dict(self.args, args, kwargs)
+
+    def __call__(self, recipients=None, *args, **kwargs):
+        recipients = RecipientFilter() if recipients is None else recipients
+        arguments = self.args.copy()
+        _update_ordered_dict(arguments, args, kwargs)
+        self.function(recipients, *arguments.values())
+
+
+# ======================================================================
+# >> BENCHMARKS
+# ======================================================================
+
+def _origins(player_count):
+    """Returns the players' origins."""
+    return [
+        standin_server.players[index]['origin']
+        for index in range(1, player_count + 1)
+    ]
+
+
+@benchmark('nearby')
+def _nearby(player_count):
+    """One get_nearby_players() query around a player."""
+    origins = _origins(player_count)
+    state = {'i': 0}
+
+    def operation():
+        state['i'] = (state['i'] + 1) % player_count
+        get_nearby_players(origins[state['i']], 512)
+    return operation
+
+
+@benchmark('nearby_grid')
+def _nearby_grid(player_count):
+    """
+    One get_nearby_players() query through the grid, which is rebuilt
+    after every player has queried once, as if on every tick.
+    """
+    origins = _origins(player_count)
+    state = {'i': 0}
+
+    def operation():
+        state['i'] = (state['i'] + 1) % player_count
+        if not state['i']:
+            player_grid.invalidate()
+        get_nearby_players(origins[state['i']], 512, grid=player_grid)
+    return operation
+
+
+@benchmark('proximity_polls')
+def _proximity_polls(player_count):
+    """A tick of every player polling for the players near them."""
+    entities = [
+        PlayerEntity(index) for index in range(1, player_count + 1)]
+
+    def operation():
+        for player in entities:
+            player.get_nearby_players(512)
+    return operation
+
+
+@benchmark('proximity_zones')
+def _proximity_zones(player_count):
+    """A tick of updating a proximity zone around every player."""
+    for index in range(1, player_count + 1):
+        ProximityZone(PlayerEntity(index), 512, _ignore_proximity)
+
+    def operation():
+        player_grid.invalidate()
+        update_proximity_zones()
+    return operation
+
+
+def _ignore_proximity(zone, player, entered):
+    """Proximity zone callback that does nothing."""
+
+
+@benchmark('effect_toggle')
+def _effect_toggle(player_count):
+    """Freezing and noclipping a player, and removing both effects."""
+    entities = [
+        PlayerEntity(index) for index in range(1, player_count + 1)]
+    state = {'i': 0}
+
+    def operation():
+        state['i'] = (state['i'] + 1) % player_count
+        player = entities[state['i']]
+        player.add_effect('freeze')
+        player.add_effect('noclip')
+        player.remove_effect('noclip')
+        player.remove_effect('freeze')
+    return operation
+
+
+@benchmark('setattr')
+def _setattr(player_count):
+    """Setting a private attribute and a property on a PlayerEntity."""
+    player = PlayerEntity(1)
+
+    def operation():
+        player._burning = False
+        player.gravity = 1.0
+    return operation
+
+
+@benchmark('setattr_legacy')
+def _setattr_legacy(player_count):
+    """The setattr benchmark with the original attribute routing."""
+    player = _LegacyPlayerEntity(1)
+
+    def operation():
+        player._burning = False
+        player.gravity = 1.0
+    return operation
+
+
+@benchmark('effect_call')
+def _effect_call(player_count):
+    """Sending a BeamRingPoint to all players, with a new origin."""
+    effect = BeamRingPoint(end_radius=200, red=255, alpha=200)
+    recipients = RecipientFilter()
+    origin = Vector(1, 2, 3)
+
+    def operation():
+        effect(recipients, origin=origin)
+    return operation
+
+
+@benchmark('effect_call_legacy')
+def _effect_call_legacy(player_count):
+    """The effect_call benchmark with the original argument handling."""
+    effect = _LegacyBeamRingPoint(end_radius=200, red=255, alpha=200)
+    recipients = RecipientFilter()
+    origin = Vector(1, 2, 3)
+
+    def operation():
+        effect(recipients, origin=origin)
+    return operation
+
+
+@benchmark('menu_send')
+def _menu_send(player_count):
+    """Sending a menu page to all players."""
+    menu = PagedMenu(
+        [PagedOption('Option {0}'.format(i), i) for i in range(50)],
+        title='Benchmark')
+    indexes = list(range(1, player_count + 1))
+
+    def operation():
+        del sent[:]
+        menu.send(*indexes)
+    return operation
+
+
+@benchmark('menu_send_changed')
+def _menu_send_changed(player_count):
+    """Sending a menu page to all players after changing the menu."""
+    menu = PagedMenu(
+        [PagedOption('Option {0}'.format(i), i) for i in range(50)],
+        title='Benchmark')
+    indexes = list(range(1, player_count + 1))
+
+    def operation():
+        del sent[:]
+        menu[0] = PagedOption('Option 0', 0)
+        menu.send(*indexes)
+    return operation
+
+
+# ======================================================================
+# >> MAIN
+# ======================================================================
+
+def main(argv=None):
+    """Runs the benchmarks and prints the results."""
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument(
+        'benchmarks', nargs='*', metavar='benchmark',
+        help='benchmarks to run, all by default ({0})'.format(
+            ', '.join(_benchmarks)))
+    parser.add_argument(
+        '--players', nargs='+', type=int, default=PLAYER_COUNTS,
+        help='simulated player counts')
+    parser.add_argument(
+        '--time', type=float, default=0.2,
+        help='minimum seconds to time each benchmark for')
+    parser.add_argument(
+        '--instrumented', action='store_true',
+        help='run with xtend.instrumentation enabled')
+    parser.add_argument(
+        '--imports', action='store_true',
+        help="measure the import time of Xtend's modules instead")
+    args = parser.parse_args(argv)
+
+    if args.imports:
+        print('{0:<25} {1:>10}'.format('module', 'import ms'))
+        for module_name in XTEND_MODULES:
+            print('{0:<25} {1:>10.2f}'.format(
+                module_name, measure_import(module_name, 5) * 1000))
+        return
+
+    if args.instrumented:
+        xtend.instrumentation.enable()
+
+    names = args.benchmarks or list(_benchmarks)
+    for name in names:
+        if name not in _benchmarks:
+            parser.error('unknown benchmark: {0}'.format(name))
+
+    print('{0:<20} {1:>7} {2:>14} {3:>12}'.format(
+        'benchmark', 'players', 'ops/sec', 'alloc B/op'))
+    for name in names:
+        for player_count in args.players:
+            setup_server(player_count)
+            ops, allocated = measure(
+                _benchmarks[name](player_count), args.time)
+            print('{0:<20} {1:>7} {2:>14,.0f} {3:>12,.0f}'.format(
+                name, player_count, ops, allocated))
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
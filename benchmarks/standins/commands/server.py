@@ -0,0 +1,16 @@
+"""Stand-in for Source.Python's commands.server."""
+
+
+class ServerCommand:
+    """Decorator registering a server command callback."""
+
+    # Command name -> callback
+    registry = {}
+
+    def __init__(self, *names):
+        self.names = names
+
+    def __call__(self, callback):
+        for name in self.names:
+            self.registry[name] = callback
+        return callback
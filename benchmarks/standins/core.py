@@ -0,0 +1,5 @@
+"""Stand-in for Source.Python's core."""
+
+
+def echo_console(text):
+    print(text)
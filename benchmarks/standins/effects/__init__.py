@@ -0,0 +1,25 @@
+"""Stand-in for Source.Python's effects, counting the temp entities."""
+
+from collections import Counter
+
+
+# Temp entity function name -> amount of calls
+calls = Counter()
+
+
+class DispatchEffectData:
+    """Empty dispatch effect data."""
+
+
+class _TempEntities:
+    """Creates counting temp entity functions on demand."""
+
+    def __getattr__(self, name):
+        def function(recipients, *args):
+            calls[name] += 1
+        function.__name__ = name
+        setattr(self, name, function)
+        return function
+
+
+temp_entities = _TempEntities()
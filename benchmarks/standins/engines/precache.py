@@ -0,0 +1,11 @@
+"""Stand-in for Source.Python's engines.precache."""
+
+_indexes = {}
+
+
+class Model:
+    """Model that gets the next free index on first precache."""
+
+    def __init__(self, path):
+        self.path = path
+        self.index = _indexes.setdefault(path, len(_indexes) + 1)
@@ -0,0 +1,12 @@
+"""Stand-in for Source.Python's entities.constants."""
+
+from enum import IntEnum
+
+
+class MoveType(IntEnum):
+    """Move types Xtend uses."""
+
+    NONE = 0
+    WALK = 2
+    NOCLIP = 8
+    JETPACK = 9
@@ -0,0 +1,18 @@
+"""Stand-in for Source.Python's events.manager."""
+
+
+class _EventManager:
+    """Keeps event callbacks and fires them on demand."""
+
+    def __init__(self):
+        self.callbacks = {}
+
+    def register_for_event(self, event_name, callback):
+        self.callbacks.setdefault(event_name, []).append(callback)
+
+    def fire(self, event_name, game_event=None):
+        for callback in self.callbacks.get(event_name, []):
+            callback(game_event)
+
+
+event_manager = _EventManager()
@@ -0,0 +1,22 @@
+"""Stand-in for Source.Python's filters.players."""
+
+import standin_server
+
+
+class PlayerIter:
+    """Iterates over the simulated players' indexes."""
+
+    def __init__(self, is_filters=None, not_filters=None):
+        self.is_filters = is_filters
+        self.not_filters = not_filters
+
+    def __iter__(self):
+        teams = {'t': 2, 'ct': 3}
+        for index, player in sorted(standin_server.players.items()):
+            if (self.is_filters in teams
+                    and player['team'] != teams[self.is_filters]):
+                continue
+            if (self.not_filters in teams
+                    and player['team'] == teams[self.not_filters]):
+                continue
+            yield index
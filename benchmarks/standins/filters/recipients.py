@@ -0,0 +1,18 @@
+"""Stand-in for Source.Python's filters.recipients."""
+
+import standin_server
+
+
+class RecipientFilter:
+    """Filter of player indexes, all players if none are given."""
+
+    def __init__(self, *player_indexes):
+        if not player_indexes:
+            player_indexes = sorted(standin_server.players)
+        self._indexes = list(player_indexes)
+
+    def __iter__(self):
+        return iter(self._indexes)
+
+    def __len__(self):
+        return len(self._indexes)
@@ -0,0 +1,13 @@
+"""Stand-in for Source.Python's hooks.exceptions."""
+
+from traceback import print_exc
+
+
+class _ExceptHooks:
+    """Prints exceptions like Source.Python's except hooks."""
+
+    def print_exception(self):
+        print_exc()
+
+
+except_hooks = _ExceptHooks()
@@ -0,0 +1,40 @@
+"""Stand-in for Source.Python's listeners, with a way to fire them."""
+
+_callbacks = {}
+
+
+class _Listener:
+    """Decorator registering a listener callback."""
+
+    def __init__(self, callback):
+        _callbacks.setdefault(type(self).__name__, []).append(callback)
+        self.callback = callback
+
+    def __call__(self, *args):
+        return self.callback(*args)
+
+
+class ClientActive(_Listener):
+    pass
+
+
+class ClientDisconnect(_Listener):
+    pass
+
+
+class ClientSettingsChanged(_Listener):
+    pass
+
+
+class LevelInit(_Listener):
+    pass
+
+
+class Tick(_Listener):
+    pass
+
+
+def fire(listener_name, *args):
+    """Calls the callbacks of a listener."""
+    for callback in _callbacks.get(listener_name, []):
+        callback(*args)
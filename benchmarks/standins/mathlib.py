@@ -0,0 +1,37 @@
+"""Stand-in for Source.Python's mathlib."""
+
+from math import sqrt
+
+
+class Vector:
+    """Three dimensional vector."""
+
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        self.x = x
+        self.y = y
+        self.z = z
+
+    def __add__(self, other):
+        return Vector(self.x + other.x, self.y + other.y, self.z + other.z)
+
+    def __sub__(self, other):
+        return Vector(self.x - other.x, self.y - other.y, self.z - other.z)
+
+    def __mul__(self, scalar):
+        return Vector(self.x * scalar, self.y * scalar, self.z * scalar)
+
+    def __eq__(self, other):
+        return (isinstance(other, Vector)
+                and (self.x, self.y, self.z) == (other.x, other.y, other.z))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return 'Vector({0}, {1}, {2})'.format(self.x, self.y, self.z)
+
+    def get_distance(self, other):
+        return sqrt(
+            (self.x - other.x) ** 2 + (self.y - other.y) ** 2
+            + (self.z - other.z) ** 2)
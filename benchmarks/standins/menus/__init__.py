@@ -0,0 +1,60 @@
+"""Stand-in for Source.Python's menus."""
+
+from math import ceil
+
+from menus.base import PagedOption
+from menus.base import Text
+from menus.base import _BaseMenu
+
+
+class PagedMenu(_BaseMenu):
+    """Paged radio menu."""
+
+    def __init__(
+            self, data=None, select_callback=None, build_callback=None,
+            description=None, title=None, top_seperator='-' * 30,
+            bottom_seperator='-' * 30, fill=True):
+        super().__init__(data, select_callback, build_callback)
+        self.title = title
+        self.description = description
+        self.top_seperator = top_seperator
+        self.bottom_seperator = bottom_seperator
+        self.fill = fill
+
+    def _get_max_item_count(self):
+        return 7
+
+    @property
+    def page_count(self):
+        return ceil(len(self) / self._get_max_item_count()) or 1
+
+    @property
+    def last_page_index(self):
+        return self.page_count - 1
+
+    def _get_options(self, page_index):
+        start = page_index * self._get_max_item_count()
+        return self[start:start + self._get_max_item_count()]
+
+    def set_player_page(self, player_index, page_index):
+        page = self._player_pages[player_index]
+        page.index = max(0, min(page_index, self.last_page_index))
+
+    def _get_menu_data(self, player_index):
+        if self.build_callback is not None:
+            self.build_callback(self, player_index)
+        page = self._player_pages[player_index]
+        slots = set()
+        message = (
+            self._format_header(player_index, page, slots)
+            + self._format_body(player_index, page, slots)
+            + self._format_footer(player_index, page, slots)
+        )
+        return {'slots': frozenset(slots), 'message': message}
+
+    def _select(self, player_index, choice_index):
+        page = self._player_pages[player_index]
+        option = page.options.get(choice_index)
+        if option is None:
+            return self
+        return super()._select(player_index, option)
@@ -0,0 +1,72 @@
+"""Stand-in for Source.Python's menus.base."""
+
+from collections import defaultdict
+
+from players.helpers import get_client_language
+
+from translations.strings import TranslationStrings
+
+
+# (player index, menu data) of every menu sent
+sent = []
+
+
+def _translate_text(text, player_index):
+    if isinstance(text, TranslationStrings):
+        return text.get_string(get_client_language(player_index))
+    return str(text)
+
+
+class _PlayerPage:
+    def __init__(self):
+        self.index = 0
+        self.options = {}
+
+
+class _BaseMenu(list):
+    def __init__(self, data=None, select_callback=None, build_callback=None):
+        super().__init__(list() if data is None else data)
+        self.select_callback = select_callback
+        self.build_callback = build_callback
+        self._player_pages = defaultdict(_PlayerPage)
+
+    def send(self, *player_indexes):
+        for player_index in player_indexes:
+            self._refresh(player_index)
+
+    def _refresh(self, player_index):
+        self._send(player_index)
+
+    def _send(self, player_index):
+        sent.append((player_index, self._get_menu_data(player_index)))
+
+    def _select(self, player_index, choice_index):
+        if self.select_callback is not None:
+            return self.select_callback(self, player_index, choice_index)
+        return None
+
+
+class _MenuData:
+    def __init__(self, text, selectable=True, highlight=True):
+        self.text = text
+        self.selectable = selectable
+        self.highlight = highlight
+
+
+class Text(_MenuData):
+    def __init__(self, text):
+        super().__init__(text, False, False)
+
+    def _render(self, player_index, choice_index=None):
+        return _translate_text(self.text, player_index) + '\n'
+
+
+class PagedOption(_MenuData):
+    def __init__(self, text, value=None, highlight=True, selectable=True):
+        super().__init__(text, selectable, highlight)
+        self.value = value
+
+    def _render(self, player_index, choice_index):
+        return '{0}{1}. {2}\n'.format(
+            '->' if self.highlight else '', choice_index,
+            _translate_text(self.text, player_index))
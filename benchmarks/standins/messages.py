@@ -0,0 +1,11 @@
+"""Stand-in for Source.Python's messages."""
+
+
+class SayText2:
+    """Chat message that isn't sent anywhere."""
+
+    def __init__(self, message=''):
+        self.message = message
+
+    def send(self, *player_indexes):
+        pass
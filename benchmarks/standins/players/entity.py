@@ -0,0 +1,52 @@
+"""Stand-in for Source.Python's players.entity."""
+
+import standin_server
+
+from mathlib import Vector
+
+
+class PlayerEntity:
+    """Player whose properties are kept in the simulated server."""
+
+    def __new__(cls, index):
+        self = super().__new__(cls)
+        self._index = index
+        return self
+
+    @property
+    def index(self):
+        return self._index
+
+    def __getattr__(self, attr):
+        player = standin_server.players[self._index]
+        if attr in player['props']:
+            return player['props'][attr]
+        if attr == 'team':
+            return player['team']
+        raise AttributeError(attr)
+
+    def __setattr__(self, attr, value):
+        if attr.startswith('_') or isinstance(
+                getattr(type(self), attr, None), property):
+            object.__setattr__(self, attr, value)
+            return
+        standin_server.players[self._index]['props'][attr] = value
+
+    def get_origin(self):
+        origin = standin_server.players[self._index]['origin']
+        return Vector(origin.x, origin.y, origin.z)
+
+    def get_property_vector(self, name):
+        props = standin_server.players[self._index]['props']
+        value = props.get(name, Vector())
+        return Vector(value.x, value.y, value.z)
+
+    def set_property_vector(self, name, value):
+        props = standin_server.players[self._index]['props']
+        props[name] = Vector(value.x, value.y, value.z)
+
+    def ignite(self):
+        standin_server.players[self._index]['props']['on_fire'] = True
+
+    def ignite_lifetime(self, lifetime):
+        standin_server.players[self._index]['props']['on_fire'] = False
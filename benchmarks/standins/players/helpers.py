@@ -0,0 +1,7 @@
+"""Stand-in for Source.Python's players.helpers."""
+
+import standin_server
+
+
+def get_client_language(index):
+    return standin_server.languages.get(index, 'en')
@@ -0,0 +1,23 @@
+"""Simulated server state shared by the stand-in modules."""
+
+# Source.Python stand-ins
+from mathlib import Vector
+
+
+# Player index -> {'origin': Vector, 'team': int, 'props': dict}
+players = {}
+
+# Player index -> language code
+languages = {}
+
+
+def add_player(index, origin=(0, 0, 0), team=2, language='en'):
+    """Adds a simulated player."""
+    players[index] = {'origin': Vector(*origin), 'team': team, 'props': {}}
+    languages[index] = language
+
+
+def reset():
+    """Removes all the simulated players."""
+    players.clear()
+    languages.clear()
@@ -0,0 +1,35 @@
+"""Stand-in for Source.Python's translations.strings."""
+
+import os
+import re
+
+
+class TranslationStrings(dict):
+    """Language code -> string."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.tokens = {}
+
+    def get_string(self, language=None, **tokens):
+        return self.get(language, self.get('en', ''))
+
+
+class LangStrings(dict):
+    """Reads Xtend's translation files from the repository."""
+
+    def __init__(self, infile):
+        super().__init__()
+        path = os.path.join(
+            os.path.dirname(__file__), '..', '..', '..', 'resource',
+            'source-python', 'translations', infile + '.ini')
+        section = None
+        with open(path) as file:
+            for line in file:
+                line = line.strip()
+                match = re.match(r'\[(.+)\]$', line)
+                if match:
+                    section = self[match.group(1)] = TranslationStrings()
+                elif '=' in line and section is not None:
+                    language, value = line.split('=', 1)
+                    section[language.strip()] = value.strip().strip('"')
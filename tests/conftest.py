@@ -0,0 +1,11 @@
+"""Runs the tests on top of the Source.Python stand-ins."""
+
+# Python 3
+import os
+import sys
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [
+    os.path.join(_ROOT, 'benchmarks', 'standins'),
+    os.path.join(_ROOT, 'addons', 'source-python', 'packages', 'custom'),
+]
@@ -0,0 +1,130 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from collections import OrderedDict
+
+# Source.Python stand-ins
+import listeners
+import standin_server
+
+from filters.recipients import RecipientFilter
+from mathlib import Vector
+
+# Xtend
+from xtend.effects import BeamPoints
+from xtend.effects import BeamRingPoint
+from xtend.effects import EffectBudget
+from xtend.effects import set_effect_budget
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+_sent = []
+
+
+class _Ring(BeamRingPoint):
+    """BeamRingPoint that remembers who it was sent to."""
+
+    function = staticmethod(
+        lambda recipients, *values: _sent.append(sorted(recipients)))
+
+
+def _setup_players(*indexes):
+    """Adds the players to an empty server and clears the sent effects."""
+    standin_server.reset()
+    for index in indexes:
+        standin_server.add_player(index)
+    listeners.fire('LevelInit', 'test')
+    listeners.fire('Tick')
+    del _sent[:]
+
+
+# ======================================================================
+# >> TESTS
+# ======================================================================
+
+def test_collapse_only_over_budget():
+    """Collapsing effects under the budget are all sent."""
+    _setup_players(1, 2)
+    budget = EffectBudget(per_tick=1000)
+    set_effect_budget(budget)
+    try:
+        ring = _Ring(origin=Vector(1, 2, 3))
+        for radius in (50, 100, 150):
+            ring(end_radius=radius)
+        ring(RecipientFilter(1))
+        ring(RecipientFilter(2))
+    finally:
+        set_effect_budget(None)
+    assert len(_sent) == 5
+    assert not budget.throttled
+
+
+def test_collapse_keeps_the_widest_ring():
+    """Over budget, overlapping rings are merged into the widest one."""
+    _setup_players(1, 2)
+    radii = []
+
+    class _WideRing(_Ring):
+        function = staticmethod(lambda recipients, *values: radii.append(
+            (sorted(recipients), values[_Ring._positions['end_radius']])))
+
+    budget = EffectBudget(per_tick=1)
+    set_effect_budget(budget)
+    try:
+        ring = _WideRing(origin=Vector(1, 2, 3))
+        for radius in (100, 50, 300, 200):
+            ring(RecipientFilter(1), end_radius=radius)
+        ring(RecipientFilter(2), end_radius=50)
+        ring(RecipientFilter(1), origin=Vector(), end_radius=50)
+        assert radii == [([1], 100)]
+        budget.per_tick = None
+        listeners.fire('Tick')
+    finally:
+        set_effect_budget(None)
+    assert sorted(radii[1:]) == [([1], 50), ([1], 300), ([2], 50)]
+    assert budget.throttled['_WideRing', 'collapsed'] == 5
+
+
+def test_deferred_effects_skip_players_who_left():
+    """Deferred effects are only resent to players still on the server."""
+    _setup_players(1, 2)
+
+    class _DeferredRing(_Ring):
+        budget_policy = 'defer'
+
+    budget = EffectBudget(per_tick=0)
+    set_effect_budget(budget)
+    try:
+        _DeferredRing()()
+        budget.per_tick = None
+        del standin_server.players[2]
+        listeners.fire('ClientDisconnect', 2)
+        listeners.fire('Tick')
+    finally:
+        set_effect_budget(None)
+    assert _sent == [[1]]
+
+
+def test_args_can_be_copied_and_assigned():
+    """args copies into an OrderedDict and assigning it sets the values."""
+    values = []
+
+    class _RedBeam(BeamPoints):
+        args = BeamPoints.args.copy()
+        args['red'] = 255
+        function = staticmethod(
+            lambda recipients, *sent: values.append(sent))
+
+    assert isinstance(BeamPoints.args.copy(), OrderedDict)
+    assert _RedBeam.args['red'] == 255
+    beam = _RedBeam()
+    beam.args = {'green': 128}
+    assert 'args' not in beam.__dict__
+    beam([])
+    sent = dict(zip(_RedBeam._names, values[0]))
+    assert sent['red'] == 255 and sent['green'] == 128
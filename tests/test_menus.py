@@ -0,0 +1,94 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Source.Python stand-ins
+import listeners
+import standin_server
+
+from menus import PagedOption
+from menus.base import sent
+
+# Xtend
+from xtend.menus import PagedMenu
+from xtend.menus import SequenceProvider
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+def _setup_players(*indexes):
+    """Adds the players to an empty server."""
+    standin_server.reset()
+    for index in indexes:
+        standin_server.add_player(index)
+    listeners.fire('LevelInit', 'test')
+    del sent[:]
+
+
+# ======================================================================
+# >> TESTS
+# ======================================================================
+
+def test_build_callback_renders_per_player():
+    """Options changed by a build_callback aren't shared between players."""
+    _setup_players(1, 2)
+    option = PagedOption('Buy')
+
+    def build(menu, player_index):
+        option.selectable = option.highlight = player_index == 1
+
+    menu = PagedMenu([option], build_callback=build)
+    menu.send(1, 2)
+    (_, first), (_, second) = sent
+    assert '->1. Buy' in first['message']
+    assert '->1. Buy' not in second['message']
+    assert 1 in first['slots']
+    assert 1 not in second['slots']
+
+
+def test_refresh_sends_options_changed_in_place():
+    """Refreshing resends options changed in place, once per change."""
+    _setup_players(1)
+    option = PagedOption('Score: 0')
+    menu = PagedMenu([option])
+    menu.send(1)
+    for score in (5, 9):
+        option.text = 'Score: {0}'.format(score)
+        menu.refresh()
+        listeners.fire('Tick')
+        assert 'Score: {0}'.format(score) in sent[-1][1]['message']
+    assert len(sent) == 3
+
+
+def test_refresh_skips_unchanged_pages():
+    """Refreshing an unchanged menu doesn't resend it."""
+    _setup_players(1)
+    builds = []
+    menu = PagedMenu(
+        [PagedOption('Option')],
+        build_callback=lambda menu, index: builds.append(index))
+    menu.send(1)
+    menu.refresh()
+    listeners.fire('Tick')
+    assert len(sent) == 1
+    assert builds == [1, 1]
+
+
+def test_filter_searches_items_without_the_factory():
+    """Prefix filters of a provider menu only create the viewed options."""
+    _setup_players(1)
+    created = []
+
+    def factory(item):
+        created.append(item)
+        return PagedOption(item)
+
+    items = ['Item {0}'.format(i) for i in range(500)] + ['Sword']
+    menu = PagedMenu(SequenceProvider(items, factory))
+    filtered = menu.filter(1, 'swo')
+    assert created == []
+    filtered.send(1)
+    assert created == ['Sword']
+    assert 'Sword' in sent[-1][1]['message']
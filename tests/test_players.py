@@ -0,0 +1,148 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from random import Random
+
+# Source.Python stand-ins
+import listeners
+import standin_server
+
+from mathlib import Vector
+
+# Xtend
+from xtend.players import PlayerEntity
+from xtend.players import PlayerGrid
+from xtend.players import disable_deferred_writes
+from xtend.players import enable_deferred_writes
+from xtend.players import get_nearby_players
+from xtend.players import ProximityZone
+
+
+# ======================================================================
+# >> HELPERS
+# ======================================================================
+
+def _nearby_indexes(pairs):
+    """Returns the (distance, index) pairs of nearby players, sorted."""
+    return sorted((distance, player.index) for distance, player in pairs)
+
+
+# ======================================================================
+# >> TESTS
+# ======================================================================
+
+def test_players_at_the_same_distance_are_all_kept():
+    """Players tied at the same distance are all returned."""
+    standin_server.reset()
+    for index, origin in enumerate(
+            ((10, 0, 0), (-10, 0, 0), (0, 10, 0), (50, 0, 0)), 1):
+        standin_server.add_player(index, origin)
+    listeners.fire('LevelInit', 'test')
+    grid = PlayerGrid(cell_size=8)
+    for nearby in (
+            get_nearby_players(Vector(), 10),
+            get_nearby_players(Vector(), 10, grid=grid)):
+        assert _nearby_indexes(nearby) == [(10, 1), (10, 2), (10, 3)]
+
+
+def test_grid_queries_match_a_full_scan():
+    """Grid queries return the same players as scanning all of them."""
+    random = Random(0)
+    standin_server.reset()
+    for index in range(1, 65):
+        standin_server.add_player(index, [
+            random.uniform(-1000, 1000) for _ in range(3)],
+            team=random.choice((2, 3)))
+    listeners.fire('LevelInit', 'test')
+    grid = PlayerGrid(cell_size=128)
+    for _ in range(800):
+        vector = Vector(*[random.uniform(-1200, 1200) for _ in range(3)])
+        radius = random.uniform(0, 1500)
+        filters = random.choice(((None, None), ('t', None), (None, 't')))
+        assert _nearby_indexes(get_nearby_players(
+            vector, radius, *filters, grid=grid)) == _nearby_indexes(
+            get_nearby_players(vector, radius, *filters))
+
+
+def test_grid_filters_are_looked_up_once_per_rebuild():
+    """Filtered indexes are cached until the grid is invalidated."""
+    standin_server.reset()
+    standin_server.add_player(1, team=2)
+    standin_server.add_player(2, team=3)
+    grid = PlayerGrid()
+    assert grid.get_indexes() is None
+    indexes = grid.get_indexes('t')
+    assert indexes == {1}
+    assert grid.get_indexes('t') is indexes
+    assert grid.get_indexes(['t']) is indexes
+    standin_server.players[2]['team'] = 2
+    grid.invalidate()
+    assert grid.get_indexes('t') == {1, 2}
+
+
+def test_failing_zone_callback_is_isolated():
+    """A raising zone callback doesn't stop other zones or the writes."""
+    standin_server.reset()
+    standin_server.add_player(1)
+    listeners.fire('LevelInit', 'test')
+    entered = []
+
+    def fail(zone, player, is_entering):
+        raise RuntimeError
+
+    first = ProximityZone(Vector(), 100, fail)
+    second = ProximityZone(
+        Vector(), 100, lambda zone, player, is_entering: entered.append(
+            player.index))
+    enable_deferred_writes()
+    try:
+        PlayerEntity(1).gravity = 0.5
+        listeners.fire('Tick')
+        assert standin_server.players[1]['props']['gravity'] == 0.5
+    finally:
+        disable_deferred_writes()
+        first.remove()
+        second.remove()
+    assert entered == [1]
+
+
+def test_deferred_writes_are_read_back_while_enabled():
+    """Pending values are only looked up while deferred writes are on."""
+    standin_server.reset()
+    standin_server.add_player(1)
+    listeners.fire('LevelInit', 'test')
+    player = PlayerEntity(1)
+    player.gravity = 1.0
+    assert '__getattr__' not in PlayerEntity.__dict__
+    enable_deferred_writes()
+    try:
+        player.gravity = 0.5
+        assert player.gravity == 0.5
+        assert standin_server.players[1]['props']['gravity'] == 1.0
+    finally:
+        disable_deferred_writes()
+    assert '__getattr__' not in PlayerEntity.__dict__
+    assert standin_server.players[1]['props']['gravity'] == 0.5
+
+
+def test_zones_only_hold_players_matching_their_filters():
+    """Players not matching a zone's filters never enter it."""
+    standin_server.reset()
+    standin_server.add_player(1, team=2)
+    standin_server.add_player(2, team=3)
+    listeners.fire('LevelInit', 'test')
+    entered = []
+    zone = ProximityZone(
+        Vector(), 100, lambda zone, player, is_entering: entered.append(
+            player.index), not_filters='ct')
+    try:
+        listeners.fire('Tick')
+        assert entered == [1]
+        assert zone.inside == {1}
+        standin_server.players[1]['team'] = 3
+        listeners.fire('Tick')
+        assert zone.inside == set()
+    finally:
+        zone.remove()
@@ -0,0 +1,58 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+import sys
+
+from pytest import raises
+
+# Source.Python stand-ins
+from effects import calls
+from mathlib import Vector
+
+# Xtend
+from xtend.effects import BeamRingPoint
+from xtend.effects import DispatchEffect
+from xtend.recordings import EffectRecorder
+from xtend.recordings import EffectRecording
+
+
+# ======================================================================
+# >> TESTS
+# ======================================================================
+
+def test_unrecordable_effects_are_still_sent():
+    """Effects the recorder can't pack are sent and counted as skipped."""
+    calls.clear()
+    with EffectRecorder() as recorder:
+        DispatchEffect()([])
+        BeamRingPoint(flags=2 ** 70)([])
+        BeamRingPoint(origin=Vector(1, 2, 3))([])
+    assert calls['dispatch_effect'] == 1
+    assert calls['beam_ring_point'] == 2
+    assert recorder.recording.skipped == 2
+
+
+def test_large_ints_round_trip():
+    """Ints outside the 32-bit range are recorded with a wider format."""
+    recording = EffectRecording()
+    values = BeamRingPoint(flags=2 ** 40)._values
+    assert recording.append(0, BeamRingPoint, values)
+    recording = EffectRecording.from_bytes(recording.to_bytes())
+    _, _, played = next(recording.iter_frames())
+    assert played[BeamRingPoint._positions['flags']] == 2 ** 40
+
+
+def test_unknown_classes_are_not_imported():
+    """Loading a recording never imports the modules it names."""
+    recording = EffectRecording()
+    recording.append(0, BeamRingPoint, BeamRingPoint._values)
+    path = b'xtend.effects:BeamRingPoint'
+    forged = b'antigravity:__name__'
+    data = recording.to_bytes().replace(
+        bytes((len(path),)) + path, bytes((len(forged),)) + forged)
+    sys.modules.pop('antigravity', None)
+    with raises(ValueError):
+        EffectRecording.from_bytes(data)
+    assert 'antigravity' not in sys.modules
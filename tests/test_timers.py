@@ -0,0 +1,75 @@
+# ======================================================================
+# >> IMPORTS
+# ======================================================================
+
+# Python 3
+from time import time
+
+# Source.Python stand-ins
+import listeners
+import standin_server
+
+# Xtend
+from xtend.players import PlayerEntity
+from xtend.timers import Scheduler
+from xtend.timers import scheduler
+
+
+# ======================================================================
+# >> TESTS
+# ======================================================================
+
+def test_cancel_from_earlier_callback_in_batch():
+    """A timer cancelled by an earlier callback of its batch never fires."""
+    tasks = Scheduler()
+    fired = []
+    second = tasks.delay(0.02, fired.append, 'second')
+    tasks.delay(0.01, second.cancel)
+    tasks.run(time() + 1)
+    assert fired == []
+    assert len(tasks) == 0
+
+
+def test_extend_from_earlier_callback_in_batch():
+    """A timer extended by an earlier callback of its batch is moved."""
+    tasks = Scheduler()
+    fired = []
+    second = tasks.delay(0.02, fired.append, 'second')
+    tasks.delay(0.01, second.extend, 10)
+    now = time() + 1
+    tasks.run(now)
+    assert fired == []
+    assert second.active
+    tasks.run(now + 20)
+    assert fired == ['second']
+
+
+def test_failing_callback_keeps_rest_of_batch():
+    """The timers after a failing callback are fired on the next run."""
+    tasks = Scheduler()
+    fired = []
+
+    def fail():
+        raise RuntimeError
+
+    tasks.delay(0.01, fail)
+    tasks.delay(0.02, fired.append, 'second')
+    try:
+        tasks.run(time() + 1)
+    except RuntimeError:
+        pass
+    tasks.run(time() + 1)
+    assert fired == ['second']
+
+
+def test_clear_effects_before_expiry_in_same_batch():
+    """Clearing effects cancels their expiry even within the same batch."""
+    standin_server.reset()
+    standin_server.add_player(1)
+    listeners.fire('LevelInit', 'test')
+    player = PlayerEntity(1)
+    scheduler.delay(0.01, player.clear_effects)
+    player.freeze(0.02)
+    scheduler.run(time() + 1)
+    assert player._effects == {}
+    assert player._effect_timers == {}